@@ -0,0 +1,194 @@
+import bisect
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.article import Article
+
+DIMENSIONS = ('source', 'author', 'day')
+
+# Values of the dimensions other than the day -> one total per measure
+_Cells = Dict[Tuple[Optional[str], ...], List[int]]
+
+
+def _day(published_at: Optional[str]) -> Optional[str]:
+    """Return the YYYY-MM-DD part of a published_at timestamp."""
+    return published_at.split('T')[0] if published_at else None
+
+
+class AggregateCube:
+    """
+    Class to keep article counts and term hits grouped by source, author and day.
+
+    Every group-by of the three dimensions (source x author x day, source x
+    day, author, ..., and the grand total) is kept up to date as articles are
+    added, so roll-ups and slices only read the small group-by they need
+    instead of scanning the articles.
+
+    Measures are 'count' (number of articles) and one measure per tracked term
+    (number of articles mentioning the term, case-insensitive, in term_fields).
+    Group-bys including the day are indexed by day, so date-range slices only
+    read the requested days.
+    """
+
+    def __init__(self, articles: Optional[Iterable[Article]] = None,
+                 terms: Sequence[str] = (), term_fields: Sequence[str] = ('title',)) -> None:
+        """
+        Initialize an AggregateCube.
+
+        Args:
+            articles: Optional articles to add
+            terms: Terms whose hits are counted
+            term_fields: Article attributes searched for the terms
+        """
+        if 'count' in terms:
+            raise ValueError("'count' is a measure and cannot be tracked as a term")
+        self.terms: List[str] = list(terms)
+        self.term_fields: Tuple[str, ...] = tuple(term_fields)
+        self._lowered_terms: List[str] = [term.lower() for term in self.terms]
+        self.measures: List[str] = ['count'] + self.terms
+        # Group-by dimensions -> day -> values of the other dimensions -> one
+        # total per measure; group-bys without the day use None as their day
+        self._cuboids: Dict[Tuple[str, ...], Dict[Optional[str], _Cells]] = {
+            dims: {}
+            for size in range(len(DIMENSIONS) + 1)
+            for dims in combinations(DIMENSIONS, size)
+        }
+        # Days seen so far, sorted, to find the days of a date range
+        self._days: List[str] = []
+        self.article_count: int = 0
+        if articles is not None:
+            self.add(articles)
+
+    def add(self, articles: Iterable[Article]) -> None:
+        """
+        Add articles to every group-by.
+
+        Args:
+            articles: Articles to add
+        """
+        for article in articles:
+            values = {'source': article.source, 'author': article.author,
+                      'day': _day(article.published_at)}
+            text = ' '.join((getattr(article, field) or '') for field in self.term_fields).lower()
+            row = [1] + [1 if term in text else 0 for term in self._lowered_terms]
+            day = values['day']
+            if day is not None and day not in self._cuboids[('day',)]:
+                bisect.insort(self._days, day)
+            for dims, days in self._cuboids.items():
+                cells = days.setdefault(day if 'day' in dims else None, {})
+                key = tuple(values[dim] for dim in dims if dim != 'day')
+                totals = cells.get(key)
+                if totals is None:
+                    cells[key] = list(row)
+                else:
+                    for position, value in enumerate(row):
+                        totals[position] += value
+            self.article_count += 1
+
+    def query(self, by: Sequence[str] = (), measure: str = 'count',
+              sources: Optional[Sequence[Optional[str]]] = None,
+              authors: Optional[Sequence[Optional[str]]] = None,
+              start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Roll up and slice the cube.
+
+        Args:
+            by: Dimensions to group by ('source', 'author', 'day')
+            measure: 'count' or a tracked term
+            sources: Optional sources to keep
+            authors: Optional authors to keep
+            start: Optional first day to keep (YYYY-MM-DD, inclusive)
+            end: Optional last day to keep (YYYY-MM-DD, inclusive)
+
+        Returns:
+            Pandas DataFrame with one column per 'by' dimension and one column
+            named after the measure, sorted by the 'by' dimensions
+        """
+        by = tuple(by)
+        unknown = [dim for dim in by if dim not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"unknown dimensions: {unknown}")
+        if measure not in self.measures:
+            raise ValueError(f"unknown measure: {measure}")
+        position = self.measures.index(measure)
+
+        filtered = {dim for dim, active in (('source', sources is not None),
+                                            ('author', authors is not None),
+                                            ('day', start is not None or end is not None))
+                    if active}
+        dims = tuple(dim for dim in DIMENSIONS if dim in by or dim in filtered)
+        other_dims = tuple(dim for dim in dims if dim != 'day')
+        source_set = set(sources) if sources is not None else None
+        author_set = set(authors) if authors is not None else None
+
+        days = self._cuboids[dims]
+        if 'day' in filtered:
+            low = bisect.bisect_left(self._days, start) if start is not None else 0
+            high = bisect.bisect_right(self._days, end) if end is not None else len(self._days)
+            selected_days: Iterable[Optional[str]] = self._days[low:high]
+        else:
+            selected_days = list(days)
+
+        totals: Dict[Tuple[Optional[str], ...], int] = {}
+        for day in selected_days:
+            for key, cell in days[day].items():
+                values = dict(zip(other_dims, key))
+                if source_set is not None and values['source'] not in source_set:
+                    continue
+                if author_set is not None and values['author'] not in author_set:
+                    continue
+                values['day'] = day
+                group = tuple(values[dim] for dim in by)
+                totals[group] = totals.get(group, 0) + cell[position]
+
+        rows = [list(group) + [total] for group, total in totals.items()]
+        df = pd.DataFrame(rows, columns=list(by) + [measure])
+        if by and len(df):
+            df = df.sort_values(list(by), na_position='last', ignore_index=True)
+        return df
+
+    def top(self, dimension: str, n: int = 10, measure: str = 'count',
+            sources: Optional[Sequence[Optional[str]]] = None,
+            authors: Optional[Sequence[Optional[str]]] = None,
+            start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get the dimension values with the largest measure, e.g. top authors.
+
+        Args:
+            dimension: Dimension to rank ('source', 'author' or 'day')
+            n: Number of rows to return
+            measure: 'count' or a tracked term
+            sources: Optional sources to keep
+            authors: Optional authors to keep
+            start: Optional first day to keep (YYYY-MM-DD, inclusive)
+            end: Optional last day to keep (YYYY-MM-DD, inclusive)
+
+        Returns:
+            Pandas DataFrame with the dimension and measure columns, largest first
+        """
+        df = self.query((dimension,), measure, sources, authors, start, end)
+        df = df[df[dimension].notna()]
+        return df.sort_values(measure, ascending=False, kind='stable').head(n).reset_index(drop=True)
+
+    def daily(self, measure: str = 'count',
+              sources: Optional[Sequence[Optional[str]]] = None,
+              authors: Optional[Sequence[Optional[str]]] = None,
+              start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        """
+        Get the measure per day, in the form plotted by NewsProcessor.
+
+        Args:
+            measure: 'count' or a tracked term
+            sources: Optional sources to keep
+            authors: Optional authors to keep
+            start: Optional first day to keep (YYYY-MM-DD, inclusive)
+            end: Optional last day to keep (YYYY-MM-DD, inclusive)
+
+        Returns:
+            Dictionary mapping days (YYYY-MM-DD) to the measure
+        """
+        df = self.query(('day',), measure, sources, authors, start, end)
+        df = df[df['day'].notna()]
+        return {day: int(value) for day, value in zip(df['day'], df[measure])}
@@ -0,0 +1,452 @@
+import bisect
+import mmap
+import os
+import struct
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.article import Article
+
+# File layout (all integers little-endian):
+#
+#   header: b"NWSARCH2", trailer_offset u64
+#   segment 0, segment 1, ...        one segment per write/append call
+#   footer: (offset, article_start, dict_start) as 3 x u64 per segment
+#   trailer: footer_start u64, segment_count u64, b"NWSAEND1"
+#
+# An append writes its segment, a new footer and a new trailer after the
+# current trailer, and only then points the header at the new trailer, so
+# the file stays readable (with its old contents) if the append is cut short.
+#
+# A segment holds:
+#   article count n u64, new dictionary string count d u64
+#   dictionary offsets (d + 1) x u64, dictionary blob
+#   for each text field: offsets (n + 1) x u64, null flags n x u8, blob
+#   source codes n x u32, author codes n x u32
+#
+# Sources and authors are stored as codes into a string dictionary shared by
+# the whole file; each segment only adds the strings it introduced. Every
+# section starts on an 8-byte boundary.
+
+_MAGIC = b"NWSARCH2"
+_HEADER = struct.Struct('<8sQ')
+_END_MAGIC = b"NWSAEND1"
+_TRAILER = struct.Struct('<QQ8s')
+_SEGMENT_HEADER = struct.Struct('<QQ')
+_FOOTER_DTYPE = np.dtype([('offset', '<u8'), ('article_start', '<u8'), ('dict_start', '<u8')])
+_NULL_CODE = 0xFFFFFFFF
+
+TEXT_FIELDS = ('url', 'title', 'description', 'published_at', 'content')
+CODED_FIELDS = ('source', 'author')
+COLUMNS = ['url', 'source', 'author', 'title', 'description', 'published_at', 'content']
+
+
+def _align(position: int) -> int:
+    """Round a position up to the next multiple of 8."""
+    return (position + 7) & ~7
+
+
+def _pad(f: BinaryIO) -> None:
+    """Write zero bytes until the file position is a multiple of 8."""
+    position = f.tell()
+    f.write(b'\0' * (_align(position) - position))
+
+
+def _write_strings(f: BinaryIO, values: List[Optional[str]], with_nulls: bool) -> None:
+    """
+    Write a list of strings as an offset table, optional null flags and a blob.
+
+    Args:
+        f: File positioned on an 8-byte boundary
+        values: Strings to write (None allowed when with_nulls is True)
+        with_nulls: Whether to write a null flag per string
+    """
+    encoded = [(value or '').encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    if encoded:
+        offsets[1:] = np.cumsum([len(data) for data in encoded])
+    f.write(offsets.tobytes())
+    if with_nulls:
+        f.write(np.array([value is None for value in values], dtype='u1').tobytes())
+        _pad(f)
+    f.write(b''.join(encoded))
+    _pad(f)
+
+
+class _Segment:
+    """
+    Class to store the positions of one segment's sections inside the buffer.
+
+    Properties:
+        count: Number of articles in the segment
+        dictionary: Offsets table and blob position of the new dictionary strings
+        text: Offsets table, null flags and blob position of each text field
+        codes: Code arrays of each dictionary-encoded field
+    """
+
+    def __init__(self, buffer: mmap.mmap, offset: int) -> None:
+        """
+        Locate the sections of the segment starting at offset.
+
+        Args:
+            buffer: Memory-mapped archive
+            offset: Position of the segment in the buffer
+        """
+        count, dict_count = _SEGMENT_HEADER.unpack_from(buffer, offset)
+        position = offset + _SEGMENT_HEADER.size
+        self.count: int = count
+
+        dict_offsets = np.frombuffer(buffer, '<u8', dict_count + 1, position)
+        position += dict_offsets.nbytes
+        self.dictionary: Tuple[np.ndarray, int] = (dict_offsets, position)
+        position = _align(position + int(dict_offsets[-1]))
+
+        self.text: Dict[str, Tuple[np.ndarray, np.ndarray, int]] = {}
+        for field in TEXT_FIELDS:
+            offsets = np.frombuffer(buffer, '<u8', count + 1, position)
+            position += offsets.nbytes
+            nulls = np.frombuffer(buffer, 'u1', count, position)
+            position = _align(position + count)
+            self.text[field] = (offsets, nulls, position)
+            position = _align(position + int(offsets[-1]))
+
+        self.codes: Dict[str, np.ndarray] = {}
+        for field in CODED_FIELDS:
+            self.codes[field] = np.frombuffer(buffer, '<u4', count, position)
+            position = _align(position + count * 4)
+
+
+class ArchivedArticle(Article):
+    """
+    Class to give a lazy, read-only Article view of one archived article.
+
+    Attributes are decoded from the archive buffer when accessed, so creating
+    a view costs nothing until its fields are read.
+    """
+
+    def __init__(self, archive: "ArticleArchive", index: int) -> None:
+        """
+        Initialize a view of an archived article.
+
+        Args:
+            archive: The archive holding the article
+            index: Position of the article in the archive
+        """
+        self._archive: "ArticleArchive" = archive
+        self._index: int = index
+
+    @property
+    def url(self) -> Optional[str]:  # type: ignore[override]
+        """The URL to the article"""
+        return self._archive._field(self._index, 'url')
+
+    @property
+    def source(self) -> Optional[str]:  # type: ignore[override]
+        """The source of the article"""
+        return self._archive._field(self._index, 'source')
+
+    @property
+    def author(self) -> Optional[str]:  # type: ignore[override]
+        """The author of the article"""
+        return self._archive._field(self._index, 'author')
+
+    @property
+    def title(self) -> Optional[str]:  # type: ignore[override]
+        """The title of the article"""
+        return self._archive._field(self._index, 'title')
+
+    @property
+    def description(self) -> Optional[str]:  # type: ignore[override]
+        """A brief description of the article"""
+        return self._archive._field(self._index, 'description')
+
+    @property
+    def published_at(self) -> Optional[str]:  # type: ignore[override]
+        """The date and time the article was published"""
+        return self._archive._field(self._index, 'published_at')
+
+    @property
+    def content(self) -> Optional[str]:  # type: ignore[override]
+        """The content of the article"""
+        return self._archive._field(self._index, 'content')
+
+
+class ArticleArchive:
+    """
+    Class to read a memory-mapped binary archive of articles.
+
+    Opening an archive only reads its trailer and segment table, so it takes
+    the same time whatever the number of articles. Articles are read lazily
+    as ArchivedArticle views, and columns() builds DataFrame columns directly
+    from the buffers. Use write() to create an archive and append() to add
+    articles (e.g., a new day) to it; reopen the archive to see appended data.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open an archive file.
+
+        Args:
+            path: Path to the archive file
+        """
+        self._file = open(path, 'rb')
+        self._buffer: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._segments: Dict[int, _Segment] = {}
+        self._dictionary_cache: Dict[int, str] = {}
+        self._footer: np.ndarray = np.empty(0, dtype=_FOOTER_DTYPE)
+        if len(self._buffer) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not an article archive")
+        magic, trailer_offset = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or trailer_offset + _TRAILER.size > len(self._buffer):
+            self.close()
+            raise ValueError(f"{path} is not an article archive")
+
+        footer_start, segment_count, end_magic = _TRAILER.unpack_from(self._buffer, trailer_offset)
+        if end_magic != _END_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an article archive")
+        self._footer = np.frombuffer(self._buffer, _FOOTER_DTYPE, segment_count, footer_start)
+        self._article_starts: List[int] = self._footer['article_start'].tolist()
+        self._dict_starts: List[int] = self._footer['dict_start'].tolist()
+        self._end: int = trailer_offset + _TRAILER.size
+        self._length: int = self._count_articles()
+
+    def _count_articles(self) -> int:
+        """Return the number of articles, read from the last segment header."""
+        if not self._article_starts:
+            return 0
+        last = len(self._article_starts) - 1
+        count, _ = _SEGMENT_HEADER.unpack_from(self._buffer, int(self._footer['offset'][last]))
+        return self._article_starts[last] + count
+
+    def __len__(self) -> int:
+        """Return the number of articles in the archive."""
+        return self._length
+
+    def __getitem__(self, index: int) -> ArchivedArticle:
+        """Return a lazy view of the article at index."""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("article index out of range")
+        return ArchivedArticle(self, index)
+
+    def __iter__(self) -> Iterator[ArchivedArticle]:
+        """Iterate over lazy views of every article."""
+        for index in range(self._length):
+            yield ArchivedArticle(self, index)
+
+    def __enter__(self) -> "ArticleArchive":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map and the file."""
+        # Drop every array referencing the buffer before closing it
+        self._segments = {}
+        self._footer = np.empty(0, dtype=_FOOTER_DTYPE)
+        self._buffer.close()
+        self._file.close()
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Build one column per Article attribute straight from the buffers.
+
+        Every column is an object array holding strings, or None for missing
+        values, as in the DataFrames built from lists of Article objects.
+
+        Returns:
+            Dictionary mapping column names to column arrays
+        """
+        columns: Dict[str, np.ndarray] = {}
+        for field in COLUMNS:
+            if field in CODED_FIELDS:
+                parts = [self._segment(number).codes[field] for number in range(len(self._article_starts))]
+                codes = np.concatenate(parts).astype(np.int64) if parts else np.empty(0, dtype=np.int64)
+                # Decode only the dictionary strings this field uses; the extra
+                # last slot of the lookup table holds None for missing values
+                size = self._dictionary_size()
+                codes[codes == _NULL_CODE] = size
+                lookup = np.full(size + 1, None, dtype=object)
+                for code in np.unique(codes).tolist():
+                    if code != size:
+                        lookup[code] = self._dictionary_string(code)
+                columns[field] = lookup[codes]
+            else:
+                values = np.empty(self._length, dtype=object)
+                for number, start in enumerate(self._article_starts):
+                    segment = self._segment(number)
+                    offsets, nulls, blob = segment.text[field]
+                    bounds = (offsets + blob).tolist()
+                    is_null = nulls.tolist()
+                    buffer = self._buffer
+                    values[start:start + segment.count] = [
+                        None if is_null[row] else buffer[bounds[row]:bounds[row + 1]].decode('utf-8')
+                        for row in range(segment.count)
+                    ]
+                columns[field] = values
+        return columns
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Convert the archive to a Pandas DataFrame.
+
+        Returns:
+            Pandas DataFrame with articles data, with the same columns, dtypes
+            and missing values as NewsProcessor.to_df on a list of articles
+        """
+        if not self._length:
+            # Same as a DataFrame built from an empty list of articles
+            return pd.DataFrame()
+        return pd.DataFrame(self.columns(), columns=COLUMNS)
+
+    def _segment(self, number: int) -> _Segment:
+        """Return the (cached) section positions of a segment."""
+        segment = self._segments.get(number)
+        if segment is None:
+            segment = _Segment(self._buffer, int(self._footer['offset'][number]))
+            self._segments[number] = segment
+        return segment
+
+    def _dictionary_size(self) -> int:
+        """Return the number of strings in the shared dictionary."""
+        if not self._dict_starts:
+            return 0
+        last = len(self._dict_starts) - 1
+        _, dict_count = _SEGMENT_HEADER.unpack_from(self._buffer, int(self._footer['offset'][last]))
+        return self._dict_starts[last] + dict_count
+
+    def _dictionary_string(self, code: int) -> str:
+        """Return the dictionary string with the given code."""
+        value = self._dictionary_cache.get(code)
+        if value is None:
+            number = bisect.bisect_right(self._dict_starts, code) - 1
+            offsets, blob = self._segment(number).dictionary
+            local = code - self._dict_starts[number]
+            value = self._buffer[blob + int(offsets[local]):blob + int(offsets[local + 1])].decode('utf-8')
+            self._dictionary_cache[code] = value
+        return value
+
+    def _field(self, index: int, field: str) -> Optional[str]:
+        """Decode one field of the article at index."""
+        number = bisect.bisect_right(self._article_starts, index) - 1
+        segment = self._segment(number)
+        row = index - self._article_starts[number]
+        if field in CODED_FIELDS:
+            code = int(segment.codes[field][row])
+            return None if code == _NULL_CODE else self._dictionary_string(code)
+        offsets, nulls, blob = segment.text[field]
+        if nulls[row]:
+            return None
+        return self._buffer[blob + int(offsets[row]):blob + int(offsets[row + 1])].decode('utf-8')
+
+    @staticmethod
+    def write(path: str, articles: Iterable[Article]) -> None:
+        """
+        Create (or overwrite) an archive holding the given articles.
+
+        Args:
+            path: Path to the archive file
+            articles: Articles to store
+        """
+        with open(path, 'wb') as f:
+            # No valid trailer until the segment is written
+            f.write(_HEADER.pack(_MAGIC, 0))
+            footer = np.empty(0, dtype=_FOOTER_DTYPE)
+            trailer_offset = ArticleArchive._write_segment(f, list(articles), footer, {})
+            ArticleArchive._set_trailer_offset(f, trailer_offset)
+
+    @staticmethod
+    def append(path: str, articles: Iterable[Article]) -> None:
+        """
+        Add articles to an existing archive as a new segment.
+
+        Existing segments, footer and trailer stay in place; the header is
+        pointed at the new trailer once everything else is on disk.
+
+        Args:
+            path: Path to the archive file
+            articles: Articles to add
+        """
+        with ArticleArchive(path) as archive:
+            footer = archive._footer.copy()
+            dictionary = {archive._dictionary_string(code): code
+                          for code in range(archive._dictionary_size())}
+            end = archive._end
+            article_count = len(archive)
+
+        with open(path, 'r+b') as f:
+            # Anything past the current trailer is left over from an append
+            # that did not complete
+            f.seek(end)
+            f.truncate()
+            trailer_offset = ArticleArchive._write_segment(f, list(articles), footer, dictionary,
+                                                           article_count)
+            ArticleArchive._set_trailer_offset(f, trailer_offset)
+
+    @staticmethod
+    def _write_segment(f: BinaryIO, articles: List[Article], footer: np.ndarray,
+                       dictionary: Dict[str, int], article_start: int = 0) -> int:
+        """
+        Write one segment followed by the updated footer and trailer.
+
+        Args:
+            f: File positioned where the segment starts
+            articles: Articles of the segment
+            footer: Footer entries of the existing segments
+            dictionary: Existing dictionary strings mapped to their codes
+            article_start: Number of articles stored before this segment
+
+        Returns:
+            Position of the new trailer
+        """
+        _pad(f)
+        offset = f.tell()
+        dict_start = len(dictionary)
+        new_strings: List[str] = []
+        codes: Dict[str, np.ndarray] = {}
+        for field in CODED_FIELDS:
+            field_codes = np.empty(len(articles), dtype='<u4')
+            for row, article in enumerate(articles):
+                value = getattr(article, field)
+                if value is None:
+                    field_codes[row] = _NULL_CODE
+                    continue
+                code = dictionary.get(value)
+                if code is None:
+                    code = len(dictionary)
+                    dictionary[value] = code
+                    new_strings.append(value)
+                field_codes[row] = code
+            codes[field] = field_codes
+
+        f.write(_SEGMENT_HEADER.pack(len(articles), len(new_strings)))
+        _write_strings(f, list(new_strings), with_nulls=False)
+        for field in TEXT_FIELDS:
+            _write_strings(f, [getattr(article, field) for article in articles], with_nulls=True)
+        for field in CODED_FIELDS:
+            f.write(codes[field].tobytes())
+            _pad(f)
+
+        entry = np.array([(offset, article_start, dict_start)], dtype=_FOOTER_DTYPE)
+        footer = np.concatenate([footer, entry])
+        footer_start = f.tell()
+        f.write(footer.tobytes())
+        trailer_offset = f.tell()
+        f.write(_TRAILER.pack(footer_start, len(footer), _END_MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+        return trailer_offset
+
+    @staticmethod
+    def _set_trailer_offset(f: BinaryIO, trailer_offset: int) -> None:
+        """Point the header at a trailer that is already on disk."""
+        f.seek(len(_MAGIC))
+        f.write(struct.pack('<Q', trailer_offset))
+        f.flush()
+        os.fsync(f.fileno())
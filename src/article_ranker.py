@@ -0,0 +1,267 @@
+import operator
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.article import Article
+from src.article_archive import COLUMNS
+from src.news_processor import NewsProcessor
+
+TOKEN = re.compile(r"\w+")
+# Drop the '[+N chars]' marker the News API appends to truncated content
+TRUNCATION_MARKER = re.compile(r"\[\+\d+ chars\]")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        List of tokens
+    """
+    if not text:
+        return []
+    return TOKEN.findall(TRUNCATION_MARKER.sub(' ', text).lower())
+
+
+class ArticleRanker:
+    """
+    Class to rank articles by relevance to a query.
+
+    Keeps a sparse term-frequency matrix of the articles' title, description
+    and content, stored both by article (CSR) and by term (CSC) as numpy index
+    arrays. Queries are scored with TF-IDF cosine similarity or BM25 by
+    summing over the postings of the query terms only. Articles can be added
+    at any time; the vocabulary grows with them.
+    """
+
+    def __init__(self, articles: Optional[List[Article]] = None, method: str = 'tfidf',
+                 fields: Sequence[str] = ('title', 'description', 'content'),
+                 k1: float = 1.5, b: float = 0.75) -> None:
+        """
+        Initialize an ArticleRanker.
+
+        Args:
+            articles: Optional list of Article objects to index
+            method: Scoring method of rank(), 'tfidf' or 'bm25'
+            fields: Article attributes to index
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        if method not in ('tfidf', 'bm25'):
+            raise ValueError(f"unknown ranking method: {method}")
+        self.method: str = method
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.k1: float = k1
+        self.b: float = b
+        self.articles: List[Article] = []
+        self.vocabulary: Dict[str, int] = {}
+        # Coordinates of the non-zero entries, appended one batch at a time
+        self._batches: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._built: bool = False
+        if articles:
+            self.add(articles)
+
+    def __len__(self) -> int:
+        """Return the number of indexed articles."""
+        return len(self.articles)
+
+    def add(self, articles: List[Article]) -> None:
+        """
+        Index more articles, adding any new terms to the vocabulary.
+
+        Args:
+            articles: List of Article objects
+        """
+        doc_ids: List[int] = []
+        term_ids: List[int] = []
+        counts: List[int] = []
+        for offset, article in enumerate(articles):
+            doc = len(self.articles) + offset
+            term_counts: Dict[int, int] = {}
+            for field in self.fields:
+                for token in tokenize(getattr(article, field)):
+                    term = self.vocabulary.setdefault(token, len(self.vocabulary))
+                    term_counts[term] = term_counts.get(term, 0) + 1
+            doc_ids.extend([doc] * len(term_counts))
+            term_ids.extend(term_counts.keys())
+            counts.extend(term_counts.values())
+
+        self.articles.extend(articles)
+        self._batches.append((np.array(doc_ids, dtype=np.int64),
+                              np.array(term_ids, dtype=np.int64),
+                              np.array(counts, dtype=np.float64)))
+        self._built = False
+
+    def rank(self, query: str, top_n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Rank the indexed articles by relevance to a query.
+
+        Args:
+            query: Search terms
+            top_n: Optional maximum number of rows to return
+
+        Returns:
+            Pandas DataFrame with articles data and a 'score' column, most
+            relevant first; articles sharing no term with the query are left out
+        """
+        self._build()
+        term_ids = [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary]
+        scores = np.zeros(len(self.articles))
+        if term_ids:
+            terms, query_counts = np.unique(np.array(term_ids), return_counts=True)
+            if self.method == 'bm25':
+                scores = self._bm25_scores(terms)
+            else:
+                query_weights = (1 + np.log(query_counts)) * self._idf[terms]
+                scores = self._dot(terms, query_weights) / np.linalg.norm(query_weights)
+                scores = np.divide(scores, self._doc_norms, out=np.zeros_like(scores),
+                                   where=self._doc_norms > 0)
+        return self._ranked_df(scores, top_n)
+
+    def similar(self, article: Union[int, Article], top_n: int = 10) -> pd.DataFrame:
+        """
+        Find the articles most similar to an indexed article.
+
+        Args:
+            article: Indexed Article object or its position in the index
+                (negative positions count from the end)
+            top_n: Maximum number of rows to return
+
+        Returns:
+            Pandas DataFrame with articles data and a 'score' column holding
+            the TF-IDF cosine similarity, most similar first
+        """
+        self._build()
+        if isinstance(article, Article):
+            index = self.articles.index(article)
+        else:
+            # Any integer type, e.g. numpy.int64; negative counts from the end
+            index = operator.index(article)
+            if index < 0:
+                index += len(self.articles)
+            if not 0 <= index < len(self.articles):
+                raise IndexError("article index out of range")
+        start, end = self._row_ptr[index], self._row_ptr[index + 1]
+        terms = self._row_terms[start:end]
+        weights = self._row_weights[start:end]
+        scores = np.zeros(len(self.articles))
+        if self._doc_norms[index] > 0:
+            scores = self._dot(terms, weights) / self._doc_norms[index]
+            scores = np.divide(scores, self._doc_norms, out=np.zeros_like(scores),
+                               where=self._doc_norms > 0)
+        scores[index] = 0.0
+        return self._ranked_df(scores, top_n)
+
+    def _build(self) -> None:
+        """Rebuild the CSR/CSC arrays and weights after articles were added."""
+        if self._built:
+            return
+        n_docs = len(self.articles)
+        n_terms = len(self.vocabulary)
+        batches = self._batches or [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                                     np.empty(0, dtype=np.float64))]
+        doc_ids = np.concatenate([batch[0] for batch in batches])
+        term_ids = np.concatenate([batch[1] for batch in batches])
+        counts = np.concatenate([batch[2] for batch in batches])
+
+        doc_freq = np.bincount(term_ids, minlength=n_terms)
+        self._doc_freq: np.ndarray = doc_freq
+        self._idf: np.ndarray = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+        tfidf = (1 + np.log(counts)) * self._idf[term_ids]
+
+        # CSR: entries are already grouped by article, in article order
+        self._row_ptr: np.ndarray = np.concatenate(([0], np.cumsum(np.bincount(doc_ids, minlength=n_docs))))
+        self._row_terms: np.ndarray = term_ids
+        self._row_weights: np.ndarray = tfidf
+        self._doc_norms: np.ndarray = np.sqrt(np.bincount(doc_ids, weights=tfidf ** 2, minlength=n_docs))
+        self._doc_lengths: np.ndarray = np.bincount(doc_ids, weights=counts, minlength=n_docs)
+
+        # CSC: the same entries grouped by term
+        order = np.argsort(term_ids, kind='stable')
+        self._col_ptr: np.ndarray = np.concatenate(([0], np.cumsum(doc_freq)))
+        self._col_docs: np.ndarray = doc_ids[order]
+        self._col_counts: np.ndarray = counts[order]
+        self._col_weights: np.ndarray = tfidf[order]
+        self._built = True
+
+    def _postings(self, terms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gather the CSC positions of the entries of several terms.
+
+        Args:
+            terms: Term ids
+
+        Returns:
+            Positions into the CSC arrays, and the index in terms of each position
+        """
+        starts = self._col_ptr[terms]
+        lengths = self._col_ptr[terms + 1] - starts
+        owners = np.repeat(np.arange(len(terms)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return starts[owners] + offsets, owners
+
+    def _dot(self, terms: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Multiply the TF-IDF matrix by a sparse vector over the given terms.
+
+        Args:
+            terms: Term ids of the vector's non-zero entries
+            weights: Values of the vector's non-zero entries
+
+        Returns:
+            Dot product of every article with the vector
+        """
+        positions, owners = self._postings(terms)
+        return np.bincount(self._col_docs[positions],
+                           weights=self._col_weights[positions] * weights[owners],
+                           minlength=len(self.articles))
+
+    def _bm25_scores(self, terms: np.ndarray) -> np.ndarray:
+        """
+        Compute the BM25 score of every article for the given query terms.
+
+        Args:
+            terms: Distinct term ids of the query
+
+        Returns:
+            BM25 score of every article
+        """
+        n_docs = len(self.articles)
+        positions, owners = self._postings(terms)
+        docs = self._col_docs[positions]
+        counts = self._col_counts[positions]
+        doc_freq = self._doc_freq[terms]
+        idf = np.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        average_length = self._doc_lengths.mean() if n_docs else 0.0
+        norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[docs] / max(average_length, 1e-9))
+        contributions = idf[owners] * counts * (self.k1 + 1) / (counts + norm)
+        return np.bincount(docs, weights=contributions, minlength=n_docs)
+
+    def _ranked_df(self, scores: np.ndarray, top_n: Optional[int]) -> pd.DataFrame:
+        """
+        Build the DataFrame of the articles with a positive score, best first.
+
+        Args:
+            scores: Score of every article
+            top_n: Optional maximum number of rows to return
+
+        Returns:
+            Pandas DataFrame with articles data and a 'score' column
+        """
+        order = np.argsort(-scores, kind='stable')
+        order = order[scores[order] > 0]
+        if top_n is not None:
+            order = order[:top_n]
+        if len(order):
+            df = NewsProcessor().to_df([self.articles[index] for index in order])
+        else:
+            # to_df of no articles has no columns at all
+            df = pd.DataFrame(columns=COLUMNS)
+        df['score'] = scores[order]
+        return df
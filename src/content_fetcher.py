@@ -0,0 +1,473 @@
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.article import Article
+from src.article_archive import ArchivedArticle
+
+# NewsAPI cuts content short and appends e.g. '... [+2817 chars]'
+TRUNCATED_CONTENT = re.compile(r"\[\+\d+ chars\]\s*$")
+
+
+def is_truncated(content: Optional[str]) -> bool:
+    """
+    Check whether article content was cut short by the News API.
+
+    Args:
+        content: Content of an article
+
+    Returns:
+        True if the content ends with a '[+N chars]' marker
+    """
+    return content is not None and TRUNCATED_CONTENT.search(content) is not None
+
+
+class _MainTextParser(HTMLParser):
+    """
+    Class to collect the paragraph text of an HTML page.
+
+    Paragraphs inside <article> are preferred; paragraphs inside scripts,
+    styles and page chrome (nav, header, footer, aside, form) are ignored.
+    End tags HTML lets pages leave out (</p>, </li>) are inferred: a
+    paragraph ends when another block starts or its container closes.
+    """
+
+    SKIPPED_TAGS = {'script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form'}
+    BLOCK_TAGS = {'p', 'h2', 'h3', 'li', 'blockquote'}
+    # Elements without content, which never get an end tag
+    VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                 'param', 'source', 'track', 'wbr'}
+    # Start tags closing an open <p>
+    CLOSES_P_TAGS = {'address', 'article', 'aside', 'blockquote', 'div', 'dl', 'fieldset',
+                     'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+                     'hr', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'ul'}
+
+    def __init__(self) -> None:
+        """Initialize an empty parser."""
+        super().__init__(convert_charrefs=True)
+        # Open elements, outermost first
+        self._open: List[str] = []
+        self._current: List[str] = []
+        self.paragraphs: List[str] = []
+        self.article_paragraphs: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in self.CLOSES_P_TAGS and 'p' in self._open:
+            self._close('p')
+        elif tag == 'li' and 'li' in self._open[self._last_list():]:
+            self._close('li')
+        if tag in self.BLOCK_TAGS:
+            self._end_block()
+        if tag not in self.VOID_TAGS:
+            self._open.append(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._open:
+            self._close(tag)
+
+    def handle_data(self, data: str) -> None:
+        if self._in_block() and not self.SKIPPED_TAGS.intersection(self._open):
+            self._current.append(data)
+
+    def close(self) -> None:
+        """Finish parsing and store the text of a block left open."""
+        super().close()
+        self._end_block()
+        self._open = []
+
+    def _in_block(self) -> bool:
+        """Return True if a block element is open."""
+        return any(tag in self.BLOCK_TAGS for tag in self._open)
+
+    def _last_list(self) -> int:
+        """Return the position of the innermost open list, or 0."""
+        for position in range(len(self._open) - 1, -1, -1):
+            if self._open[position] in ('ul', 'ol'):
+                return position
+        return 0
+
+    def _close(self, tag: str) -> None:
+        """Close the innermost open tag and every element opened inside it."""
+        position = len(self._open) - 1 - self._open[::-1].index(tag)
+        if any(open_tag in self.BLOCK_TAGS for open_tag in self._open[position:]):
+            self._end_block()
+        del self._open[position:]
+
+    def _end_block(self) -> None:
+        """Store the text collected since the last block boundary."""
+        text = ' '.join(''.join(self._current).split())
+        self._current = []
+        if text:
+            self.paragraphs.append(text)
+            if 'article' in self._open:
+                self.article_paragraphs.append(text)
+
+
+def extract_main_text(html: str) -> str:
+    """
+    Extract the main text of an article page.
+
+    Args:
+        html: HTML of the page
+
+    Returns:
+        The paragraphs of the page separated by blank lines
+    """
+    parser = _MainTextParser()
+    parser.feed(html)
+    parser.close()
+    return '\n\n'.join(parser.article_paragraphs or parser.paragraphs)
+
+
+class HostRateLimiter:
+    """
+    Class to decide which queued requests may start, host by host.
+
+    Requests wait in a queue per host. Requests to one host start at least
+    min_interval seconds apart and at most max_concurrent of them run at the
+    same time; a heap orders the hosts by the time their next request may
+    start, so pop_ready() only hands out requests that may start now and a
+    busy host never delays the others. Not thread-safe: callers serialize
+    access (ContentFetcher holds its condition lock).
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_concurrent: int = 2,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize a HostRateLimiter.
+
+        Args:
+            min_interval: Minimum number of seconds between two request starts
+                to the same host
+            max_concurrent: Maximum number of requests in flight per host
+            clock: Function returning the current time in seconds
+        """
+        self._min_interval: float = min_interval
+        self._max_concurrent: int = max_concurrent
+        self._clock: Callable[[], float] = clock
+        self._pending: Dict[str, Deque[Any]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._next_slot: Dict[str, float] = {}
+        # (ready time, tie breaker, host) for hosts with a request that may
+        # start once the ready time is reached
+        self._ready_heap: List[Tuple[float, int, str]] = []
+        self._scheduled: Set[str] = set()
+        self._sequence: Iterator[int] = itertools.count()
+
+    def push(self, host: str, item: Any) -> None:
+        """
+        Queue a request to host.
+
+        Args:
+            host: Host name the request is sent to
+            item: Request to hand out when it may start
+        """
+        self._pending.setdefault(host, deque()).append(item)
+        self._schedule(host)
+
+    def pop_ready(self) -> List[Tuple[str, Any]]:
+        """
+        Take every queued request that may start now.
+
+        The returned requests count as in flight until release() is called.
+
+        Returns:
+            List of (host, item) pairs, earliest ready first
+        """
+        now = self._clock()
+        ready: List[Tuple[str, Any]] = []
+        while self._ready_heap and self._ready_heap[0][0] <= now:
+            _, _, host = heapq.heappop(self._ready_heap)
+            self._scheduled.discard(host)
+            waiting = self._pending[host]
+            ready.append((host, waiting.popleft()))
+            if not waiting:
+                del self._pending[host]
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self._next_slot[host] = now + self._min_interval
+            self._schedule(host)
+        return ready
+
+    def next_ready_in(self) -> Optional[float]:
+        """
+        Get the number of seconds until pop_ready() can hand out a request.
+
+        Returns:
+            Number of seconds, or None if every queued request waits for a
+            release() (or nothing is queued)
+        """
+        if not self._ready_heap:
+            return None
+        return max(self._ready_heap[0][0] - self._clock(), 0.0)
+
+    def release(self, host: str) -> None:
+        """
+        Mark a request to host as finished.
+
+        Args:
+            host: Host name the request was sent to
+        """
+        self._in_flight[host] -= 1
+        if not self._in_flight[host]:
+            del self._in_flight[host]
+            if self._next_slot.get(host, 0.0) <= self._clock():
+                del self._next_slot[host]
+        self._schedule(host)
+
+    def drain(self) -> List[Any]:
+        """
+        Remove every queued request.
+
+        Returns:
+            The requests that were still waiting
+        """
+        items = [item for waiting in self._pending.values() for item in waiting]
+        self._pending.clear()
+        self._ready_heap.clear()
+        self._scheduled.clear()
+        return items
+
+    def _schedule(self, host: str) -> None:
+        """Put host on the ready heap if it has a request that may start."""
+        if (host in self._scheduled or host not in self._pending
+                or self._in_flight.get(host, 0) >= self._max_concurrent):
+            return
+        ready_at = self._next_slot.get(host, self._clock())
+        heapq.heappush(self._ready_heap, (ready_at, next(self._sequence), host))
+        self._scheduled.add(host)
+
+
+class ContentFetcher:
+    """
+    Class to replace truncated article content with the full article text.
+
+    Pages are downloaded from Article.url by a pool of threads sharing one
+    pooled HTTP session. Requests wait in per-host queues and a dispatcher
+    thread hands a page to the pool only once its host's rate limit allows
+    it, so downloading threads never wait for a slow or busy host. Results
+    are cached by URL and revalidated with ETag/Last-Modified conditional
+    requests.
+    """
+
+    def __init__(self, workers: int = 32, min_interval_per_host: float = 1.0,
+                 max_concurrent_per_host: int = 2, timeout: float = 10.0,
+                 cache_size: int = 10000, only_truncated: bool = True) -> None:
+        """
+        Initialize a ContentFetcher.
+
+        Args:
+            workers: Number of pages downloaded at the same time
+            min_interval_per_host: Minimum number of seconds between two
+                requests to the same host
+            max_concurrent_per_host: Maximum number of requests in flight per host
+            timeout: Number of seconds to wait for a page
+            cache_size: Maximum number of pages kept in the cache
+            only_truncated: Only fetch articles whose content was truncated
+        """
+        self._timeout: float = timeout
+        self._cache_size: int = cache_size
+        self._only_truncated: bool = only_truncated
+        self._limiter: HostRateLimiter = HostRateLimiter(min_interval_per_host, max_concurrent_per_host)
+        # Guards the limiter; notified when a request is queued or finishes
+        self._condition: threading.Condition = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed: bool = False
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers,
+                                                                thread_name_prefix="content-fetcher")
+        self._session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        # url -> (etag, last_modified, text)
+        self._cache: "OrderedDict[str, Tuple[Optional[str], Optional[str], str]]" = OrderedDict()
+        self._cache_lock: threading.Lock = threading.Lock()
+        self.fetched: int = 0
+        self.revalidated: int = 0
+        self.errors: int = 0
+
+    def enrich(self, articles: List[Article]) -> List[Article]:
+        """
+        Fill in the full content of every article concurrently.
+
+        Args:
+            articles: List of Article objects, updated in place
+
+        Returns:
+            The same list of Article objects
+        """
+        for future in [self.submit(article) for article in articles]:
+            future.result()
+        return articles
+
+    def enrich_article(self, article: Article) -> Article:
+        """
+        Fill in the full content of one article and wait for it.
+
+        Args:
+            article: Article object, updated in place
+
+        Returns:
+            The same Article object
+        """
+        return self.submit(article).result()
+
+    def submit(self, article: Article) -> "Future[Article]":
+        """
+        Schedule filling in the full content of one article.
+
+        The content is left unchanged if the article has no URL, was not
+        truncated (when only_truncated is set) or the page cannot be fetched.
+        Read-only ArchivedArticle views are rejected with a TypeError.
+
+        Args:
+            article: Article object, updated in place
+
+        Returns:
+            Future resolving to the same Article object
+        """
+        if isinstance(article, ArchivedArticle):
+            raise TypeError("cannot enrich a read-only ArchivedArticle; copy it into an Article first")
+        result: "Future[Article]" = Future()
+        if article.url is None or (self._only_truncated and not is_truncated(article.content)):
+            result.set_result(article)
+            return result
+
+        def fill(text_future: "Future[Optional[str]]") -> None:
+            # Runs as a done callback, whose exceptions concurrent.futures
+            # only logs: any error must reach result or its waiters hang
+            try:
+                if text_future.cancelled():
+                    result.cancel()
+                    return
+                text = text_future.result()
+                if text:
+                    article.content = text
+            except Exception as error:
+                result.set_exception(error)
+                return
+            result.set_result(article)
+
+        self._submit_url(article.url).add_done_callback(fill)
+        return result
+
+    def fetch_text(self, url: str) -> Optional[str]:
+        """
+        Get the main text of the page at url, using the cache when possible.
+
+        Args:
+            url: URL of the page
+
+        Returns:
+            Main text of the page, or None if it could not be fetched
+        """
+        return self._submit_url(url).result()
+
+    def close(self) -> None:
+        """Cancel the pages still waiting for their host and stop the threads."""
+        with self._condition:
+            self._closed = True
+            waiting = self._limiter.drain()
+            self._condition.notify_all()
+        for _, future in waiting:
+            future.cancel()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _submit_url(self, url: str) -> "Future[Optional[str]]":
+        """Queue the download of url behind its host's rate limit."""
+        future: "Future[Optional[str]]" = Future()
+        with self._cache_lock:
+            cached = self._cache.get(url)
+        if cached is not None and cached[0] is None and cached[1] is None:
+            # Nothing to revalidate with, so no request to rate-limit
+            future.set_result(cached[2])
+            return future
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("content fetcher is closed")
+            self._limiter.push(urlsplit(url).netloc, (url, future))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="content-dispatcher",
+                                                    daemon=True)
+                self._dispatcher.start()
+            self._condition.notify_all()
+        return future
+
+    def _dispatch(self) -> None:
+        """Dispatcher thread: hand each page to the pool once its host is ready."""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    ready = self._limiter.pop_ready()
+                    if ready:
+                        break
+                    self._condition.wait(self._limiter.next_ready_in())
+            for host, (url, future) in ready:
+                self._executor.submit(self._run, host, url, future)
+
+    def _run(self, host: str, url: str, future: "Future[Optional[str]]") -> None:
+        """Pool thread: download one page and free its host's slot."""
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self._download(url))
+                except Exception as error:
+                    future.set_exception(error)
+        finally:
+            with self._condition:
+                self._limiter.release(host)
+                self._condition.notify_all()
+
+    def _download(self, url: str) -> Optional[str]:
+        """Download the page at url, revalidating its cached text if any."""
+        with self._cache_lock:
+            cached = self._cache.get(url)
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag is None and last_modified is None:
+                return cached[2]
+            if etag is not None:
+                headers['If-None-Match'] = etag
+            if last_modified is not None:
+                headers['If-Modified-Since'] = last_modified
+
+        try:
+            response = self._session.get(url, headers=headers, timeout=self._timeout)
+        except requests.RequestException:
+            with self._cache_lock:
+                self.errors += 1
+            return cached[2] if cached is not None else None
+
+        if response.status_code == 304 and cached is not None:
+            with self._cache_lock:
+                self.revalidated += 1
+                if url in self._cache:
+                    self._cache.move_to_end(url)
+            return cached[2]
+        if response.status_code != 200:
+            with self._cache_lock:
+                self.errors += 1
+            return None
+
+        text = extract_main_text(response.text)
+        with self._cache_lock:
+            self.fetched += 1
+            self._cache[url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'), text)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return text
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+
+class PooledKey:
+    """
+    Class to store one API key of a KeyPool and its usage.
+
+    The key itself is never included in the string representation, so a
+    PooledKey can be printed or logged safely.
+
+    Properties:
+        label: Public name of the key (e.g., 'key-0'), safe to log
+        quota: Number of requests allowed per quota window
+        used: Number of requests sent in the current quota window
+        window_start: Time at which the current quota window started
+        benched_until: Time until which the key must not be used
+        requests: Total number of requests sent with the key
+        errors: Total number of 401/429 responses received with the key
+        remaining_hint: Remaining quota reported by the API, if any
+    """
+
+    def __init__(self, label: str, secret: str, quota: int, now: float) -> None:
+        """
+        Initialize a PooledKey.
+
+        Args:
+            label: Public name of the key
+            secret: The API key
+            quota: Number of requests allowed per quota window
+            now: Current time
+        """
+        self.label: str = label
+        self.__secret: str = secret
+        self.quota: int = quota
+        self.used: int = 0
+        self.window_start: float = now
+        self.benched_until: float = 0.0
+        self.requests: int = 0
+        self.errors: int = 0
+        self.remaining_hint: Optional[int] = None
+
+    @property
+    def secret(self) -> str:
+        """The API key. Only pass it to the request, never log it."""
+        return self.__secret
+
+    @property
+    def remaining(self) -> int:
+        """Requests left in the current quota window."""
+        remaining = self.quota - self.used
+        if self.remaining_hint is not None:
+            remaining = min(remaining, self.remaining_hint)
+        return max(remaining, 0)
+
+    def __str__(self) -> str:
+        """Return the label of the key, never the key itself."""
+        return self.label
+
+    def __repr__(self) -> str:
+        """Return a representation of the key that hides the key itself."""
+        return f"PooledKey(label={self.label}, remaining={self.remaining})"
+
+
+class KeyPool:
+    """
+    Class to spread News API requests across several API keys.
+
+    Each request uses the available key with the most quota left. A key that
+    receives a 401 or 429 response is benched for the cool-down period and
+    traffic moves to the other keys.
+    """
+
+    BENCH_STATUS_CODES = (401, 429)
+
+    def __init__(self, keys: List[str], quota_per_key: int = 100,
+                 quota_window: float = 24 * 60 * 60, cooldown: float = 60 * 60,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize a KeyPool.
+
+        Args:
+            keys: The API keys
+            quota_per_key: Number of requests allowed per key per quota window
+            quota_window: Length of a quota window in seconds
+            cooldown: Number of seconds a key is benched after a 401/429
+            clock: Function returning the current time in seconds
+        """
+        self._lock: threading.Lock = threading.Lock()
+        self._clock: Callable[[], float] = clock
+        self._quota_window: float = quota_window
+        self._cooldown: float = cooldown
+        now = clock()
+        self._keys: List[PooledKey] = [
+            PooledKey(f"key-{index}", key, quota_per_key, now)
+            for index, key in enumerate(keys)
+        ]
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs: Any) -> "KeyPool":
+        """
+        Create a KeyPool from a key file or a directory of key files.
+
+        A key file holds one key per line. Blank lines and lines starting
+        with '#' are ignored.
+
+        Args:
+            path: Path to a key file or to a directory of key files
+            **kwargs: Extra arguments passed to the KeyPool constructor
+
+        Returns:
+            KeyPool holding every key found
+        """
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if os.path.isfile(os.path.join(path, name))]
+        else:
+            files = [path]
+
+        keys: List[str] = []
+        for file in files:
+            with open(file, 'r') as f:
+                text = f.read()
+            file_keys = [line.strip() for line in text.splitlines()
+                         if line.strip() and not line.strip().startswith('#')]
+            keys.extend(file_keys)
+        if not keys:
+            # Keep the single-key behaviour for an empty key file
+            keys = ['']
+        return cls(keys, **kwargs)
+
+    def __len__(self) -> int:
+        """Return the number of keys in the pool."""
+        return len(self._keys)
+
+    def acquire(self) -> Optional[PooledKey]:
+        """
+        Pick the key to use for the next request.
+
+        Returns:
+            The available key with the most quota left, or None if every key
+            is benched or out of quota
+        """
+        with self._lock:
+            now = self._clock()
+            best: Optional[PooledKey] = None
+            for key in self._keys:
+                if now - key.window_start >= self._quota_window:
+                    key.window_start = now
+                    key.used = 0
+                    key.remaining_hint = None
+                if key.benched_until > now or key.remaining <= 0:
+                    continue
+                if best is None or key.remaining > best.remaining:
+                    best = key
+            if best is not None:
+                best.used += 1
+                best.requests += 1
+            return best
+
+    def report(self, key: PooledKey, status_code: int,
+               headers: Optional[Mapping[str, Any]] = None) -> None:
+        """
+        Record the outcome of a request sent with a key.
+
+        Args:
+            key: The key used for the request
+            status_code: HTTP status code of the response
+            headers: Response headers, used to read the remaining quota
+        """
+        with self._lock:
+            if status_code in self.BENCH_STATUS_CODES:
+                key.errors += 1
+                key.benched_until = self._clock() + self._cooldown
+            if headers is not None:
+                remaining = headers.get('X-RateLimit-Remaining')
+                if isinstance(remaining, (str, int)) and str(remaining).isdigit():
+                    key.remaining_hint = int(remaining)
+
+    def usage_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get usage statistics for every key, indexed by key label.
+
+        Returns:
+            Dictionary mapping key labels to their requests, errors, remaining
+            quota and whether they are currently benched
+        """
+        with self._lock:
+            now = self._clock()
+            return {
+                key.label: {
+                    'requests': key.requests,
+                    'errors': key.errors,
+                    'remaining': key.remaining,
+                    'benched': key.benched_until > now,
+                }
+                for key in self._keys
+            }
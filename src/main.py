@@ -4,63 +4,202 @@ Example usage of the News API classes.
 Before running this code:
 1. Get your API key from https://newsapi.org/register
 2. Make sure to not push it to Github!
+
+Run with --watch to keep polling queries instead of running the examples, e.g.
+    python src/main.py --watch --term bitcoin --term "climate change" --interval 300
+
+Run with --profile DIR to write a per-stage profile (report.txt, one .pstats
+file per stage and stacks.folded for flamegraph tools) of the examples.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import argparse
+import os
+import signal
 import sys
 sys.path.append('.')  # To allow imports from src
+from src.article import Article
+from src.article_archive import ArticleArchive
 from src.search_news import SearchNews
 from src.news_processor import NewsProcessor
+from src.pipeline import news_pipeline
+from src.profiler import StageProfiler
+from src.watcher import DeltaPoller, WatchQuery
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments.
 
+    Args:
+        argv: Optional arguments to parse instead of sys.argv
 
-def main() -> None:
-    # Initialize the news searcher
-    # Make sure you have your API key in 'api_key.txt'
-    # print(os.path.exists('./key_stora.txt'))
-    searcher = SearchNews('key_stora')
-    
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="News API examples and watch mode")
+    parser.add_argument("--key-file", default="key_stora",
+                        help="API key file, or directory of key files")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep polling the queries until SIGTERM/Ctrl-C")
+    parser.add_argument("--term", action="append", default=[],
+                        help="Search term to watch (one query per --term)")
+    parser.add_argument("--domain", action="append", default=[],
+                        help="Domain to watch (one query per --domain)")
+    parser.add_argument("--language", default=None, help="Language filter (e.g., 'en')")
+    parser.add_argument("--interval", type=float, default=300.0,
+                        help="Seconds between two polls of a query")
+    parser.add_argument("--jitter", type=float, default=30.0,
+                        help="Maximum random seconds added to each interval")
+    parser.add_argument("--archive", default=None,
+                        help="Append new articles to this article archive instead of printing them")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="Profile each example stage and write the reports to DIR")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="Seconds between two stack samples of the flamegraph output")
+    parser.add_argument("--profile-top", type=int, default=10,
+                        help="Number of functions and allocation sites listed per stage")
+    return parser.parse_args(argv)
+
+
+def watch(searcher: SearchNews, args: argparse.Namespace) -> None:
+    """
+    Poll the queries given on the command line until SIGTERM or Ctrl-C.
+
+    Args:
+        searcher: SearchNews shared by every query
+        args: Parsed command line arguments
+    """
+    since = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    queries = [WatchQuery(f"term:{term}", terms=[term], language=args.language,
+                          interval=args.interval, jitter=args.jitter, since=since)
+               for term in args.term]
+    queries += [WatchQuery(f"domain:{domain}", domains=[domain], language=args.language,
+                           interval=args.interval, jitter=args.jitter, since=since)
+                for domain in args.domain]
+    if not queries:
+        print("Error: --watch needs at least one --term or --domain")
+        return
+
+    def print_sink(query: WatchQuery, articles: List[Article]) -> None:
+        for article in articles:
+            print(f"[{query.name}] {article}")
+
+    def archive_sink(query: WatchQuery, articles: List[Article]) -> None:
+        if os.path.exists(args.archive):
+            ArticleArchive.append(args.archive, articles)
+        else:
+            ArticleArchive.write(args.archive, articles)
+        print(f"[{query.name}] archived {len(articles)} new articles")
+
+    poller = DeltaPoller(searcher, queries, archive_sink if args.archive else print_sink)
+    signal.signal(signal.SIGTERM, lambda signum, frame: poller.stop())
+    print(f"Watching {len(queries)} queries, press Ctrl-C to stop...")
+    try:
+        poller.run()
+    except KeyboardInterrupt:
+        poller.stop()
+    print("Stopped watching")
+
+
+def run_examples(searcher: SearchNews, profiler: StageProfiler) -> None:
+    """
+    Run the examples, each inside a profiler stage.
+
+    Args:
+        searcher: SearchNews used by the examples
+        profiler: StageProfiler measuring each example (may be disabled)
+    """
     # Initialize the processor
     processor = NewsProcessor()
     
     # Example 1: Get top headlines
     print("Getting top headlines...")
-    headlines = searcher.get_top_headlines("technology")
+    with profiler.stage("top_headlines"):
+        headlines = searcher.get_top_headlines("technology")
     print(f"Found {len(headlines)} headlines")
     
     # Example 2: Convert to DataFrame
     print("\nConverting to DataFrame...")
-    df = processor.to_df(headlines)
+    with profiler.stage("to_df"):
+        df = processor.to_df(headlines)
     print(df.head())
     
     # Example 3: Filter articles (only articles with authors)
     print("\nFiltering articles with authors...")
-    df_with_authors = processor.to_df(
-        headlines, 
-        filter_func=lambda article: article.author is not None
-    )
+    with profiler.stage("to_df_filter"):
+        df_with_authors = processor.to_df(
+            headlines, 
+            filter_func=lambda article: article.author is not None
+        )
     print(f"Articles with authors: {len(df_with_authors)}")
     
     # Example 4: Sort by publication date
     print("\nSorting by publication date...")
-    df_sorted = processor.to_df(
-        headlines,
-        sort_by=lambda article: article.published_at
-    )
+    with profiler.stage("to_df_sort"):
+        df_sorted = processor.to_df(
+            headlines,
+            sort_by=lambda article: article.published_at
+        )
     print("Sorted DataFrame created")
     print(df_sorted.head())
     
     # Example 5: Plot word popularity
     print("\nPlotting word popularity...")
-    processor.plot_word_popularity(headlines, "AI")
+    with profiler.stage("plot"):
+        processor.plot_word_popularity(headlines, "AI")
     
     # Example 6: Search everything for a specific term
     print("\nSearching everything for 'climate change'...")
     yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-    climate_articles = searcher.get_everything(yesterday, None, 'en', "climate change")
+    with profiler.stage("everything"):
+        climate_articles = searcher.get_everything(yesterday, None, 'en', "climate change")
     print(f"Found {len(climate_articles)} articles about climate change")
 
+    # Example 7: Fetch several queries through a staged pipeline
+    print("\nFetching several queries through a pipeline...")
+    pipeline_articles: List[Article] = []
+    pipeline = news_pipeline(
+        searcher,
+        sink=pipeline_articles.append,
+        filter_func=lambda article: article.title is not None,
+        fetch_workers=3
+    )
+    with profiler.stage("pipeline"):
+        pipeline.run([
+            ("everything", {"q": term, "from": yesterday, "language": "en"})
+            for term in ["climate change", "bitcoin", "AI"]
+        ])
+    print(f"Pipeline collected {len(pipeline_articles)} unique articles")
+    print(pipeline.stats())
+    print(processor.to_df(pipeline_articles).head())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    # Initialize the news searcher
+    # Make sure you have your API key in 'api_key.txt'
+    # print(os.path.exists('./key_stora.txt'))
+    searcher = SearchNews(args.key_file)
+
+    if args.watch:
+        watch(searcher, args)
+        return
+
+    profiler = StageProfiler(args.profile, sample_interval=args.profile_interval,
+                             top=args.profile_top)
+    profiler.start()
+    try:
+        run_examples(searcher, profiler)
+    finally:
+        profiler.stop()
+        if profiler.enabled:
+            print(f"\nProfile written to {args.profile}")
+            for name, summary in profiler.summary().items():
+                print(f"  {name}: {summary['wall_seconds']:.3f}s, "
+                      f"peak {summary['peak_bytes'] / 2 ** 20:.2f} MiB")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,8 +1,11 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-from typing import List, Dict, Callable, Optional, Any
+from typing import List, Dict, Callable, Optional, Any, Union
 import datetime
 from src.article import Article
+from src.article_archive import ArticleArchive
+from src.aggregate_cube import AggregateCube
+from src.watchlist_matcher import WatchlistHits
 
 
 class NewsProcessor:
@@ -10,7 +13,7 @@ class NewsProcessor:
     Class to process and visualize news articles data.
     """
 
-    def to_df(self, articles: List[Article],
+    def to_df(self, articles: Union[List[Article], ArticleArchive],
               sort_by: Optional[Callable[[Article], Any]] = None,
               filter_func: Optional[Callable[[Article], bool]] = None
     ) -> pd.DataFrame:
@@ -18,7 +21,9 @@ class NewsProcessor:
         Convert list of Article objects to a Pandas DataFrame.
 
         Args:
-            articles: List of Article objects
+            articles: List of Article objects, or an ArticleArchive whose
+                columns are built straight from its buffers when no
+                sort_by/filter_func is given
             sort_by: Optional function to sort rows by
             filter_func: Optional function to filter rows (include rows where function returns True)
 
@@ -29,6 +34,11 @@ class NewsProcessor:
         # Each Article attribute will be a column
         # Each article will be a row
 
+        if isinstance(articles, ArticleArchive):
+            if filter_func is None and sort_by is None:
+                return articles.to_df()
+            articles = list(articles)
+
         # TODO: Apply filtering if filter_func is provided
         if filter_func is not None:
             articles = [article for article in articles if filter_func(article)]
@@ -74,17 +84,61 @@ class NewsProcessor:
         date_counts: Dict[str, int] = {}
         for info_set in list_of_dict_of_date_title:
             if search_term.lower() in info_set["title"].lower():
-                date_counts[info_set["date"].split('T')[0]] += 1
+                date = info_set["date"].split('T')[0]
+                date_counts[date] = date_counts.get(date, 0) + 1
         # 3. Create a plot with dates on x-axis and frequency on y-axis
+        # 4. Display the plot
+        self._plot_date_counts(date_counts, f'Frequency of "{search_term}" in Article Titles Over Time')
+
+    def plot_cube(self, cube: AggregateCube, measure: str = 'count',
+                  sources: Optional[List[Optional[str]]] = None,
+                  authors: Optional[List[Optional[str]]] = None,
+                  start: Optional[str] = None, end: Optional[str] = None) -> None:
+        """
+        Plot a measure of an aggregate cube per day, without scanning articles.
+
+        Args:
+            cube: AggregateCube built from the articles
+            measure: 'count' or one of the cube's tracked terms
+            sources: Optional sources to keep
+            authors: Optional authors to keep
+            start: Optional first day to keep (YYYY-MM-DD, inclusive)
+            end: Optional last day to keep (YYYY-MM-DD, inclusive)
+        """
+        date_counts = cube.daily(measure, sources, authors, start, end)
+        if measure == 'count':
+            title = 'Number of Articles Over Time'
+        else:
+            title = f'Frequency of "{measure}" in Articles Over Time'
+        self._plot_date_counts(date_counts, title)
+
+    def plot_watchlist(self, hits: WatchlistHits, term: str) -> None:
+        """
+        Plot the number of articles mentioning a watchlist term over time.
+
+        Args:
+            hits: WatchlistHits returned by WatchlistMatcher.scan
+            term: The watchlist term to plot
+        """
+        self._plot_date_counts(hits.date_counts.get(term, {}),
+                               f'Frequency of "{term}" in Articles Over Time')
+
+    def _plot_date_counts(self, date_counts: Dict[str, int], title: str) -> None:
+        """
+        Helper method to plot counts per date and display the plot.
+
+        Args:
+            date_counts: Dictionary mapping dates (YYYY-MM-DD) to counts
+            title: Title of the plot
+        """
         sorted_dates = sorted(date_counts.keys())
         frequencies: List[int] = [date_counts[date] for date in sorted_dates]
 
-        # 4. Display the plot
         plt.figure(figsize=(10, 6))
         plt.plot(sorted_dates, frequencies, marker='o')
         plt.xlabel('Date')
         plt.ylabel('Frequency')
-        plt.title(f'Frequency of "{search_term}" in Article Titles Over Time')
+        plt.title(title)
         plt.xticks(rotation=45)  # Rotate x-axis labels for readability
         plt.tight_layout()  # Adjust layout to prevent label cutoff
         plt.show()
@@ -0,0 +1,278 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from src.article import Article
+from src.content_fetcher import ContentFetcher
+from src.search_news import SearchNews
+
+# Put on a stage's input queue to tell one of its workers to finish
+_END = object()
+
+
+class Stage:
+    """
+    Class to store one stage of a Pipeline and its throughput counters.
+
+    Properties:
+        name: Name of the stage
+        fn: Function called on each input item, returning an iterable of
+            output items for the next stage (or None for no output)
+        workers: Number of worker threads running fn
+        queue_size: Maximum number of items waiting in the stage's input queue
+        processed: Number of input items handled
+        emitted: Number of output items passed to the next stage
+        errors: Number of input items for which fn raised an exception
+        busy_seconds: Total time spent inside fn by all workers
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Iterable[Any]]],
+                 workers: int = 1, queue_size: int = 100) -> None:
+        """
+        Initialize a Stage.
+
+        Args:
+            name: Name of the stage
+            fn: Function called on each input item
+            workers: Number of worker threads running fn
+            queue_size: Maximum number of items waiting in the input queue
+        """
+        self.name: str = name
+        self.fn: Callable[[Any], Optional[Iterable[Any]]] = fn
+        self.workers: int = workers
+        self.queue_size: int = queue_size
+        self.processed: int = 0
+        self.emitted: int = 0
+        self.errors: int = 0
+        self.busy_seconds: float = 0.0
+
+
+class Pipeline:
+    """
+    Class to run items through a chain of stages using worker threads.
+
+    Stages are connected by bounded queues, so a slow stage blocks the stages
+    feeding it and, in the end, submit(): a slow sink throttles the fetchers.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a Pipeline without stages."""
+        self._stages: List[Stage] = []
+        self._queues: List["queue.Queue[Any]"] = []
+        self._threads: List[threading.Thread] = []
+        self._finished_workers: List[int] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._stopping: threading.Event = threading.Event()
+        self._started_at: Optional[float] = None
+        self._closed: bool = False
+
+    def add_stage(self, name: str, fn: Callable[[Any], Optional[Iterable[Any]]],
+                  workers: int = 1, queue_size: int = 100) -> "Pipeline":
+        """
+        Append a stage to the pipeline.
+
+        Args:
+            name: Name of the stage
+            fn: Function called on each input item, returning an iterable of
+                output items for the next stage (or None for no output)
+            workers: Number of worker threads running fn
+            queue_size: Maximum number of items waiting in the input queue
+
+        Returns:
+            The pipeline, so calls can be chained
+        """
+        if self._started_at is not None:
+            raise RuntimeError("cannot add a stage to a running pipeline")
+        self._stages.append(Stage(name, fn, workers, queue_size))
+        return self
+
+    def start(self) -> None:
+        """Start the worker threads of every stage."""
+        if self._started_at is not None:
+            raise RuntimeError("pipeline already started")
+        self._started_at = time.monotonic()
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in self._stages]
+        self._finished_workers = [0] * len(self._stages)
+        for index, stage in enumerate(self._stages):
+            for number in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,),
+                                          name=f"{stage.name}-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, item: Any) -> None:
+        """
+        Feed an item to the first stage, blocking while its queue is full.
+
+        Args:
+            item: Input item of the first stage
+        """
+        if self._closed:
+            raise RuntimeError("pipeline is closed")
+        self._queues[0].put(item)
+
+    def close(self) -> None:
+        """Stop accepting items and wait until every submitted item is handled."""
+        if self._started_at is None:
+            raise RuntimeError("pipeline not started")
+        with self._lock:
+            already_closed = self._closed
+            self._closed = True
+        if not already_closed:
+            for _ in range(self._stages[0].workers):
+                self._queues[0].put(_END)
+        for thread in self._threads:
+            thread.join()
+
+    def stop(self) -> None:
+        """Drop items that are still queued and shut the workers down."""
+        self._stopping.set()
+        self.close()
+
+    def run(self, items: Iterable[Any]) -> None:
+        """
+        Start the pipeline, feed it every item and wait for it to finish.
+
+        Args:
+            items: Input items of the first stage
+        """
+        self.start()
+        try:
+            for item in items:
+                if self._stopping.is_set():
+                    break
+                self.submit(item)
+        finally:
+            self.close()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the throughput counters of every stage, indexed by stage name.
+
+        Returns:
+            Dictionary mapping stage names to their processed/emitted/errors
+            counts, busy time and items processed per second since start
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        with self._lock:
+            return {
+                stage.name: {
+                    'processed': stage.processed,
+                    'emitted': stage.emitted,
+                    'errors': stage.errors,
+                    'busy_seconds': stage.busy_seconds,
+                    'per_second': stage.processed / elapsed if elapsed > 0 else 0.0,
+                }
+                for stage in self._stages
+            }
+
+    def _work(self, index: int) -> None:
+        """
+        Worker loop of one thread of the stage at index.
+
+        Args:
+            index: Position of the stage in the pipeline
+        """
+        stage = self._stages[index]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self._queues) else None
+        while True:
+            item = inbox.get()
+            if item is _END:
+                break
+            if self._stopping.is_set():
+                continue
+
+            started = time.monotonic()
+            outputs: List[Any] = []
+            failed = False
+            try:
+                outputs = list(stage.fn(item) or [])
+            except Exception as error:
+                failed = True
+                print(f"Error in stage {stage.name}: {error}")
+            with self._lock:
+                stage.processed += 1
+                stage.errors += failed
+                stage.busy_seconds += time.monotonic() - started
+
+            if outbox is not None:
+                for output in outputs:
+                    outbox.put(output)
+                with self._lock:
+                    stage.emitted += len(outputs)
+
+        with self._lock:
+            self._finished_workers[index] += 1
+            last_worker = self._finished_workers[index] == stage.workers
+        if last_worker and outbox is not None:
+            # Everything this stage emitted is queued ahead of the end markers
+            for _ in range(self._stages[index + 1].workers):
+                outbox.put(_END)
+
+
+def news_pipeline(searcher: SearchNews, sink: Callable[[Article], None],
+                  filter_func: Optional[Callable[[Article], bool]] = None,
+                  fetch_workers: int = 4, parse_workers: int = 2,
+                  sink_workers: int = 1, queue_size: int = 100,
+                  content_fetcher: Optional[ContentFetcher] = None) -> Pipeline:
+    """
+    Build a fetch -> parse -> dedup/filter -> sink pipeline of news articles.
+
+    The pipeline takes (endpoint, params) queries, e.g.
+    ('everything', {'q': 'bitcoin'}), and calls sink with each new Article.
+    When a content_fetcher is given, an enrich stage queues the download of
+    the full content of truncated articles and passes the pending result
+    on; the sink waits for it, while pages of other hosts keep downloading.
+
+    Args:
+        searcher: SearchNews used to fetch the queries
+        sink: Function called with each article that passed the filter
+        filter_func: Optional function to filter articles (keep articles where
+            function returns True)
+        fetch_workers: Number of threads sending API requests
+        parse_workers: Number of threads creating Article objects
+        sink_workers: Number of threads calling sink
+        queue_size: Maximum number of items waiting before each stage
+        content_fetcher: Optional ContentFetcher used by the enrich stage
+
+    Returns:
+        Pipeline ready to be run
+    """
+    seen_urls: Set[str] = set()
+    seen_lock = threading.Lock()
+
+    def fetch(query: Tuple[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+        endpoint, params = query
+        return searcher.fetch(endpoint, params).get("articles", [])
+
+    def parse(entry: Dict[str, Any]) -> List[Article]:
+        return [searcher.create_article(entry)]
+
+    def dedup_filter(article: Article) -> List[Article]:
+        if article.url is not None:
+            with seen_lock:
+                if article.url in seen_urls:
+                    return []
+                seen_urls.add(article.url)
+        if filter_func is not None and not filter_func(article):
+            return []
+        return [article]
+
+    def write(article: Union[Article, "Future[Article]"]) -> None:
+        sink(article.result() if isinstance(article, Future) else article)
+
+    pipeline = (Pipeline()
+                .add_stage("fetch", fetch, workers=fetch_workers, queue_size=queue_size)
+                .add_stage("parse", parse, workers=parse_workers, queue_size=queue_size)
+                .add_stage("dedup_filter", dedup_filter, workers=1, queue_size=queue_size))
+    if content_fetcher is not None:
+        fetcher = content_fetcher
+
+        def enrich(article: Article) -> List["Future[Article]"]:
+            return [fetcher.submit(article)]
+
+        pipeline.add_stage("enrich", enrich, workers=1, queue_size=queue_size)
+    return pipeline.add_stage("sink", write, workers=sink_workers, queue_size=queue_size)
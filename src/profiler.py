@@ -0,0 +1,215 @@
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import ContextManager, Dict, Iterator, List, Optional
+
+# Returned by StageProfiler.stage() when profiling is off
+_NO_PROFILING: ContextManager[None] = contextlib.nullcontext()
+
+
+class StageReport:
+    """
+    Class to store the measurements of one profiled stage.
+
+    Properties:
+        name: Name of the stage
+        wall_seconds: Wall-clock time spent in the stage
+        peak_bytes: Peak traced memory while the stage ran, above the memory
+            already in use when it started
+        stats: cProfile statistics of the thread running the stage
+        top_allocations: Formatted top allocation sites of the stage
+    """
+
+    def __init__(self, name: str, wall_seconds: float, peak_bytes: int,
+                 stats: pstats.Stats, top_allocations: List[str]) -> None:
+        """
+        Initialize a StageReport.
+
+        Args:
+            name: Name of the stage
+            wall_seconds: Wall-clock time spent in the stage
+            peak_bytes: Peak traced memory while the stage ran, above the
+                memory already in use when it started
+            stats: cProfile statistics of the thread running the stage
+            top_allocations: Formatted top allocation sites of the stage
+        """
+        self.name: str = name
+        self.wall_seconds: float = wall_seconds
+        self.peak_bytes: int = peak_bytes
+        self.stats: pstats.Stats = stats
+        self.top_allocations: List[str] = top_allocations
+
+
+class StageProfiler:
+    """
+    Class to profile named stages of a run.
+
+    Each stage gets its wall time, a cProfile of the thread running it, its
+    peak memory and top allocation sites from tracemalloc. A sampling thread
+    records the stacks of every thread as folded stacks ('a;b;c count'), the
+    input format of flamegraph.pl and speedscope. When disabled, stage()
+    returns a shared no-op context manager and nothing is measured.
+    Stages must not be nested.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, sample_interval: float = 0.005,
+                 top: int = 10) -> None:
+        """
+        Initialize a StageProfiler.
+
+        Args:
+            output_dir: Directory receiving the reports; profiling is off when None
+            sample_interval: Number of seconds between two stack samples
+            top: Number of functions and allocation sites listed per stage
+        """
+        self.enabled: bool = output_dir is not None
+        self._output_dir: Optional[str] = output_dir
+        self._sample_interval: float = sample_interval
+        self._top: int = top
+        self._reports: List[StageReport] = []
+        self._current_stage: Optional[str] = None
+        self._samples: Counter = Counter()
+        self._sampling: threading.Event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start tracing allocations and sampling stacks."""
+        if not self.enabled:
+            return
+        tracemalloc.start()
+        self._sampling.set()
+        self._sampler = threading.Thread(target=self._sample, name="stage-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop profiling and write the reports to the output directory."""
+        if not self.enabled:
+            return
+        self._sampling.clear()
+        if self._sampler is not None:
+            self._sampler.join()
+        tracemalloc.stop()
+        self.write_reports()
+
+    def stage(self, name: str) -> ContextManager[None]:
+        """
+        Get a context manager profiling the code it wraps as a stage.
+
+        Args:
+            name: Name of the stage
+
+        Returns:
+            Context manager to use in a with statement
+        """
+        if not self.enabled:
+            return _NO_PROFILING
+        return self._profile_stage(name)
+
+    @contextlib.contextmanager
+    def _profile_stage(self, name: str) -> Iterator[None]:
+        """Measure one stage; see stage()."""
+        if self._current_stage is not None:
+            raise RuntimeError(f"stage {name} started inside stage {self._current_stage}")
+        self._current_stage = name
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall_seconds = time.perf_counter() - started
+            peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+            after = tracemalloc.take_snapshot()
+            self._current_stage = None
+            # Leave out the profiler's own allocations
+            ignored = [tracemalloc.Filter(False, tracemalloc.__file__),
+                       tracemalloc.Filter(False, __file__)]
+            differences = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), 'lineno')
+            self._reports.append(StageReport(
+                name, wall_seconds, peak_bytes, pstats.Stats(profile),
+                [str(difference) for difference in differences[:self._top]]))
+
+    def _sample(self) -> None:
+        """Sampling thread: count the folded stack of every other thread."""
+        own_id = threading.get_ident()
+        while self._sampling.is_set():
+            stage = self._current_stage or '(no stage)'
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                names: List[str] = []
+                current = frame
+                while current is not None:
+                    code = current.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{current.f_lineno})")
+                    current = current.f_back
+                self._samples[';'.join([stage] + names[::-1])] += 1
+            time.sleep(self._sample_interval)
+
+    def reports(self) -> List[StageReport]:
+        """Return the reports of the stages profiled so far."""
+        return list(self._reports)
+
+    def write_reports(self) -> None:
+        """Write report.txt, one .pstats file per stage and stacks.folded."""
+        if self._output_dir is None:
+            return
+        os.makedirs(self._output_dir, exist_ok=True)
+        with open(os.path.join(self._output_dir, 'report.txt'), 'w') as f:
+            f.write(self.format_report())
+        for number, report in enumerate(self._reports):
+            report.stats.dump_stats(os.path.join(self._output_dir, f"{number:02d}_{report.name}.pstats"))
+        with open(os.path.join(self._output_dir, 'stacks.folded'), 'w') as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write(f"{stack} {count}\n")
+
+    def format_report(self) -> str:
+        """
+        Format the per-stage report.
+
+        Returns:
+            Summary table of every stage followed by its top functions and
+            top allocation sites
+        """
+        lines: List[str] = [
+            "Peak memory is measured above the memory in use when each stage started.",
+            "Function statistics (here and in the .pstats files) only cover the thread",
+            "running each stage; stacks.folded samples every thread, workers included.",
+            '',
+            f"{'stage':<20} {'wall (s)':>10} {'peak (MiB)':>12}",
+        ]
+        for report in self._reports:
+            lines.append(f"{report.name:<20} {report.wall_seconds:>10.3f} "
+                         f"{report.peak_bytes / 2 ** 20:>12.2f}")
+        for report in self._reports:
+            lines.append('')
+            lines.append(f"=== {report.name} ===")
+            stream = io.StringIO()
+            report.stats.stream = stream  # type: ignore[attr-defined]
+            report.stats.sort_stats('cumulative').print_stats(self._top)
+            lines.append(stream.getvalue().strip())
+            lines.append('Top allocation sites:')
+            lines.extend(f"  {allocation}" for allocation in report.top_allocations)
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the wall time and peak memory of every stage, indexed by stage name.
+
+        Returns:
+            Dictionary mapping stage names to their wall_seconds and peak_bytes
+        """
+        return {report.name: {'wall_seconds': report.wall_seconds,
+                              'peak_bytes': report.peak_bytes}
+                for report in self._reports}
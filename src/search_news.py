@@ -1,6 +1,9 @@
 import requests
-from typing import Optional, List, Dict, Any
+import asyncio
+from typing import Optional, List, Dict, Any, Tuple
 from src.article import Article
+from src.single_flight import SingleFlight, AsyncSingleFlight
+from src.key_pool import KeyPool
 import os
 
 
@@ -10,14 +13,21 @@ class SearchNews:
     Class to interact with the News API and retrieve news articles.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, quota_per_key: int = 100,
+                 cooldown: float = 60 * 60):
         """
-        Initialize SearchNews by reading API key from file.
+        Initialize SearchNews by reading API keys from a file or directory.
 
         Args:
-            api_key_file: Path to file containing the API key
+            api_key: Path to a file containing one API key per line, or to a
+                directory of such files
+            quota_per_key: Number of requests allowed per key per day
+            cooldown: Number of seconds a key is benched after a 401/429
         """
-        self.__api_key = open(api_key, 'r').read().strip()
+        self.__key_pool: KeyPool = KeyPool.from_path(
+            api_key, quota_per_key=quota_per_key, cooldown=cooldown)
+        self._single_flight: SingleFlight = SingleFlight()
+        self._async_single_flight: AsyncSingleFlight = AsyncSingleFlight()
 
     def get_top_headlines(self, date: Optional[str] = None, domains: Optional[List[str]] = None, language: Optional[str] = None, *terms: str) -> List[Article]:
         """
@@ -33,33 +43,9 @@ class SearchNews:
             List of Article objects
         """
 
-        # TODO: Implement API call to /top-headlines endpoint
-        params = {
-            'apiKey': self.__api_key,
-        }
-
-        if terms:
-            params['q'] = ' '.join(terms)
-        if date:
-            params['from'] = date
-        if domains:
-            params["domains"] = ",".join(domains)
-        if language:
-            params["language"] = language
-
-        list_of_articles: List[Article] = []
-
-        response = requests.get("https://newsapi.org/v2/top-headlines", params=params)
-
-        if response.status_code == 200:
-            data = response.json()
-            for article in data["articles"]:
-                list_of_articles.append(Article(url=article.get("url"), source=article.get("source", {}).get("name"), author=article.get("author"), title=article.get("title"), description=article.get("description"), published_at=article.get("publishedAt"), content=article.get("content")))
-        else:
-            print(f"Error: {response.status_code}")
-            return []
-        
-        return list_of_articles
+        params = self._search_params(date, domains, language, terms)
+        response_data = self._make_request("top-headlines", params)
+        return self._create_articles_from_response(response_data)
 
 
     def get_everything(
@@ -82,37 +68,144 @@ class SearchNews:
             List of Article objects
         """
 
-        params = {
-            'apiKey': self.__api_key,
-        }
+        params = self._search_params(date, domains, language, terms)
+        response_data = self._make_request("everything", params)
+        return self._create_articles_from_response(response_data)
+
+    async def get_top_headlines_async(self, date: Optional[str] = None, domains: Optional[List[str]] = None,
+                                      language: Optional[str] = None, *terms: str) -> List[Article]:
+        """
+        Asyncio variant of get_top_headlines.
+
+        The HTTP request runs in a worker thread, and concurrent tasks making
+        the same request share it.
+
+        Args:
+            date: Optional date filter (YYYY-MM-DD format)
+            domain: Optional domain filter (e.g., 'bbc.co.uk')
+            language: Optional language filter (e.g., 'en')
+            *terms: Variable number of search terms
+
+        Returns:
+            List of Article objects
+        """
+        params = self._search_params(date, domains, language, terms)
+        response_data = await self._make_request_async("top-headlines", params)
+        return self._create_articles_from_response(response_data)
+
+    async def get_everything_async(self, date: Optional[str] = None, domains: Optional[List[str]] = None,
+                                   language: Optional[str] = None, *terms: str) -> List[Article]:
+        """
+        Asyncio variant of get_everything.
+
+        The HTTP request runs in a worker thread, and concurrent tasks making
+        the same request share it.
+
+        Args:
+            date: Optional date filter (YYYY-MM-DD format)
+            domain: Optional domain filter (e.g., 'bbc.co.uk')
+            language: Optional language filter (e.g., 'en')
+            *terms: Variable number of search terms
+
+        Returns:
+            List of Article objects
+        """
+        params = self._search_params(date, domains, language, terms)
+        response_data = await self._make_request_async("everything", params)
+        return self._create_articles_from_response(response_data)
+
+    def fetch(self, endpoint: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Send a request to any News API endpoint and return its parsed response.
+
+        Concurrent calls with the same endpoint and params share a single
+        in-flight HTTP request; the returned dictionary is shared between
+        them and must not be mutated.
+
+        Args:
+            endpoint: API endpoint (e.g., 'everything')
+            params: Query parameters for the request (without the API key)
+
+        Returns:
+            Dictionary of JSON response, or an empty dictionary on error
+        """
+        return self._make_request(endpoint, params)
+
+    async def fetch_async(self, endpoint: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Asyncio variant of fetch.
+
+        Args:
+            endpoint: API endpoint (e.g., 'everything')
+            params: Query parameters for the request (without the API key)
+
+        Returns:
+            Dictionary of JSON response, or an empty dictionary on error
+        """
+        return await self._make_request_async(endpoint, params)
+
+    def create_article(self, article: Dict[str, Any]) -> Article:
+        """
+        Create one Article object from an API article entry.
+
+        Args:
+            article: One entry of the 'articles' field of an API response
+
+        Returns:
+            Article object
+        """
+        return Article(url=article.get("url"), source=(article.get("source") or {}).get("name"), author=article.get("author"), title=article.get("title"), description=article.get("description"), published_at=article.get("publishedAt"), content=article.get("content"))
+
+    def key_usage_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get usage statistics for each API key, indexed by key label.
+
+        Returns:
+            Dictionary mapping key labels (never the keys) to their stats
+        """
+        return self.__key_pool.usage_stats()
+
+    @property
+    def coalesced_requests(self) -> int:
+        """Number of calls that reused another caller's in-flight request."""
+        return (self._single_flight.coalesced_count
+                + self._async_single_flight.coalesced_count)
+
+    def _search_params(self, date: Optional[str], domains: Optional[List[str]],
+                       language: Optional[str], terms: Tuple[str, ...]) -> Dict[str, str]:
+        """
+        Helper method to build the query parameters of a search.
+
+        Args:
+            date: Optional date filter (YYYY-MM-DD format)
+            domains: Optional domain filter
+            language: Optional language filter
+            terms: Search terms
+
+        Returns:
+            Query parameters for the request
+        """
+        params: Dict[str, str] = {}
 
         if terms:
-            params["q"] = ' '.join(terms)
+            params['q'] = ' '.join(terms)
         if date:
             params['from'] = date
         if domains:
             params["domains"] = ",".join(domains)
         if language:
             params["language"] = language
-        # TODO: Implement API call to /everything endpoint
-        list_of_articles: List[Article] = []
-
-        response = requests.get("https://newsapi.org/v2/everything", params=params)
-
-        if response.status_code == 200:
-            data = response.json()
-            for article in data["articles"]:
-                list_of_articles.append(Article(url=article.get("url"), source=article.get("source", {}).get("name"), author=article.get("author"), title=article.get("title"), description=article.get("description"), published_at=article.get("publishedAt"), content=article.get("content")))
-        else:
-            print(f"Error: {response.status_code}")
-            return []
-        
-        return list_of_articles
+        return params
 
     def _make_request(self, endpoint: str, params: Dict[str, str]) -> Any:
         """
         Helper method to make API requests.
 
+        Concurrent calls with the same endpoint and params share a single
+        in-flight HTTP request and all receive its parsed result (or error).
+        The returned dictionary is shared between those callers and must not
+        be mutated.
+
         Args:
             endpoint: API endpoint (e.g., 'top-headlines')
             params: Query parameters for the request
@@ -120,15 +213,75 @@ class SearchNews:
         Returns:
             Dictionary of JSON response
         """
-        # TODO: Implement helper method for making API requests
+        return self._single_flight.do(
+            self._request_key(endpoint, params),
+            lambda: self._send_request(endpoint, params))
 
+    async def _make_request_async(self, endpoint: str, params: Dict[str, str]) -> Any:
+        """
+        Asyncio variant of _make_request.
+
+        Concurrent tasks with the same endpoint and params share a single
+        in-flight HTTP request, which runs in a worker thread.
+
+        Args:
+            endpoint: API endpoint (e.g., 'top-headlines')
+            params: Query parameters for the request
+
+        Returns:
+            Dictionary of JSON response
+        """
+        return await self._async_single_flight.do(
+            self._request_key(endpoint, params),
+            lambda: asyncio.to_thread(self._send_request, endpoint, params))
+
+    def _request_key(self, endpoint: str, params: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        """
+        Helper method to build the coalescing key of a request.
+
+        Args:
+            endpoint: API endpoint (e.g., 'top-headlines')
+            params: Query parameters for the request
+
+        Returns:
+            Hashable key identifying identical requests
+        """
+        return (endpoint, tuple(sorted(params.items())))
+
+    def _send_request(self, endpoint: str, params: Dict[str, str]) -> Any:
+        """
+        Helper method to send one HTTP request to the News API.
 
-        response = requests.get(f"https://newsapi.org/v2/{endpoint}", params=params)
-        if response.status_code != 200:
-            print(f"Error: {response.status_code}")
-            return {}
-        return response.json() # ts is a dictionary ()
-        
+        Args:
+            endpoint: API endpoint (e.g., 'top-headlines')
+            params: Query parameters for the request (without the API key)
+
+        Returns:
+            Dictionary of JSON response, or an empty dictionary on error
+        """
+        status_code: Optional[int] = None
+        # Try each key at most once; 401/429 bench the key and move on
+        for _ in range(len(self.__key_pool)):
+            key = self.__key_pool.acquire()
+            if key is None:
+                break
+            # The key goes in a header, never in the URL, so it cannot leak
+            # into exception messages or urllib3 logs
+            response = requests.get(f"https://newsapi.org/v2/{endpoint}", params=params,
+                                    headers={'X-Api-Key': key.secret})
+            status_code = response.status_code
+            self.__key_pool.report(key, status_code, response.headers)
+            if status_code in KeyPool.BENCH_STATUS_CODES:
+                continue
+            if status_code != 200:
+                break
+            return response.json()
+
+        if status_code is None:
+            print("Error: no API key available")
+        else:
+            print(f"Error: {status_code}")
+        return {}
 
     def _create_articles_from_response(self, response_data: Dict[str, Any]) -> List[Article]:
         """
@@ -142,8 +295,7 @@ class SearchNews:
         """
         # TODO: Parse the 'articles' field from response and create Article objects
         list_of_articles: List[Article] = []
-        for article in response_data["articles"]:
-                list_of_articles.append(Article(url=article.get("url"), source=article.get("source", {}).get("name"), author=article.get("author"), title=article.get("title"), description=article.get("description"), published_at=article.get("publishedAt"), content=article.get("content")))
+        for article in response_data.get("articles", []):
+            list_of_articles.append(self.create_article(article))
 
         return list_of_articles
-        
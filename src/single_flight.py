@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """
+    Class to store the state of one in-flight call shared by its callers.
+
+    Properties:
+        done: Event set once the call has finished
+        result: The value returned by the call
+        error: The exception raised by the call, if any
+    """
+
+    def __init__(self) -> None:
+        """Initialize an unfinished call."""
+        self.done: threading.Event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Class to coalesce identical concurrent calls made from several threads.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it is still running wait for it and receive the same
+    result (or the same exception) instead of running it again.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty SingleFlight group."""
+        self._lock: threading.Lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._coalesced: int = 0
+
+    @property
+    def coalesced_count(self) -> int:
+        """Number of calls that were served by another caller's request."""
+        return self._coalesced
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers using the same key.
+
+        Args:
+            key: Identifies calls that may share a result
+            fn: Function performing the actual work
+
+        Returns:
+            The value returned by fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    Class to coalesce identical concurrent calls made from asyncio tasks.
+
+    Works like SingleFlight but for coroutines running on one event loop.
+    The shared call runs as its own task, so cancelling any caller (including
+    the first one) does not cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty AsyncSingleFlight group."""
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._coalesced: int = 0
+
+    @property
+    def coalesced_count(self) -> int:
+        """Number of calls that were served by another caller's request."""
+        return self._coalesced
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn once for all concurrent callers using the same key.
+
+        Args:
+            key: Identifies calls that may share a result
+            fn: Function returning the awaitable performing the actual work
+
+        Returns:
+            The value produced by fn
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            async def run() -> Any:
+                return await fn()
+
+            task = asyncio.ensure_future(run())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        """Forget a finished call and mark its exception as retrieved."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # nobody may be left to await it
@@ -0,0 +1,252 @@
+import heapq
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.article import Article
+from src.search_news import SearchNews
+
+
+class WatchQuery:
+    """
+    Class to store one query polled by a DeltaPoller and its progress.
+
+    Properties:
+        name: Name of the query, used in messages
+        terms: Search terms
+        domains: Optional domain filter (e.g., ['bbc.co.uk'])
+        language: Optional language filter (e.g., 'en')
+        endpoint: API endpoint (e.g., 'everything')
+        interval: Number of seconds between two polls
+        jitter: Maximum number of seconds randomly added to each interval
+        page_size: Number of articles requested per page
+        max_pages: Maximum number of pages fetched per poll
+        last_seen: Latest published_at seen so far
+        seen_at_last: URLs of the articles published exactly at last_seen
+    """
+
+    def __init__(self, name: str, terms: Optional[List[str]] = None,
+                 domains: Optional[List[str]] = None, language: Optional[str] = None,
+                 endpoint: str = 'everything', interval: float = 300.0,
+                 jitter: float = 30.0, since: Optional[str] = None,
+                 page_size: int = 100, max_pages: int = 5) -> None:
+        """
+        Initialize a WatchQuery.
+
+        Args:
+            name: Name of the query
+            terms: Search terms
+            domains: Optional domain filter
+            language: Optional language filter
+            endpoint: API endpoint (e.g., 'everything')
+            interval: Number of seconds between two polls
+            jitter: Maximum number of seconds randomly added to each interval
+            since: Optional published_at to start from (ISO format)
+            page_size: Number of articles requested per page (at most 100)
+            max_pages: Maximum number of pages fetched per poll
+        """
+        self.name: str = name
+        self.terms: List[str] = terms or []
+        self.domains: Optional[List[str]] = domains
+        self.language: Optional[str] = language
+        self.endpoint: str = endpoint
+        self.interval: float = interval
+        self.jitter: float = jitter
+        self.page_size: int = page_size
+        self.max_pages: int = max_pages
+        self.last_seen: Optional[str] = since
+        self.seen_at_last: Set[str] = set()
+
+    def params(self, page: int = 1) -> Dict[str, str]:
+        """
+        Build the request parameters asking for articles since last_seen.
+
+        Args:
+            page: Page to request, starting at 1 for the newest articles
+
+        Returns:
+            Query parameters for the request
+        """
+        params: Dict[str, str] = {'pageSize': str(self.page_size), 'page': str(page)}
+        if self.terms:
+            params['q'] = ' '.join(self.terms)
+        if self.domains:
+            params['domains'] = ','.join(self.domains)
+        if self.language:
+            params['language'] = self.language
+        if self.endpoint == 'everything':
+            params['sortBy'] = 'publishedAt'
+            if self.last_seen:
+                params['from'] = self.last_seen
+        return params
+
+    def new_articles(self, articles: List[Article]) -> List[Article]:
+        """
+        Keep the articles published since last_seen that were not seen yet.
+
+        Args:
+            articles: Articles returned for the query
+
+        Returns:
+            Articles not delivered before, oldest first
+        """
+        fresh: List[Article] = []
+        for article in articles:
+            published_at = article.published_at
+            if published_at is None:
+                continue
+            if self.last_seen is not None:
+                if published_at < self.last_seen:
+                    continue
+                if published_at == self.last_seen and article.url in self.seen_at_last:
+                    continue
+            fresh.append(article)
+
+        fresh.sort(key=lambda article: article.published_at or '')
+        return fresh
+
+    def caught_up(self, page_articles: List[Article], page: int,
+                  total_results: Optional[int]) -> bool:
+        """
+        Tell whether no page after this one can hold unseen articles.
+
+        Args:
+            page_articles: Articles returned for the page, newest first
+            page: Number of the page
+            total_results: Total number of results reported by the API
+
+        Returns:
+            True if the next page does not need to be fetched
+        """
+        if len(page_articles) < self.page_size:
+            return True
+        if total_results is not None and page * self.page_size >= total_results:
+            return True
+        # Without a last_seen there is nothing to catch up with: start from
+        # the newest page
+        if self.last_seen is None:
+            return True
+        return any(article.published_at is not None and article.published_at <= self.last_seen
+                   for article in page_articles)
+
+    def mark_seen(self, articles: List[Article]) -> None:
+        """
+        Move last_seen forward past delivered articles.
+
+        Args:
+            articles: Delivered articles, oldest first
+        """
+        for article in articles:
+            if article.published_at != self.last_seen:
+                self.last_seen = article.published_at
+                self.seen_at_last = set()
+            if article.url is not None:
+                self.seen_at_last.add(article.url)
+
+
+class DeltaPoller:
+    """
+    Class to poll many queries on their own schedules with one SearchNews.
+
+    Each query runs every interval seconds plus a random jitter, so queries
+    sharing an interval do not all fire at once. Only articles newer than
+    the query's last seen published_at are passed to the sink; a poll pages
+    back (up to the query's max_pages) until it reaches them.
+    """
+
+    def __init__(self, searcher: SearchNews, queries: List[WatchQuery],
+                 sink: Callable[[WatchQuery, List[Article]], None],
+                 clock: Callable[[], float] = time.monotonic,
+                 rng: Optional[random.Random] = None) -> None:
+        """
+        Initialize a DeltaPoller.
+
+        Args:
+            searcher: SearchNews used for every query
+            queries: Queries to poll
+            sink: Function called with a query and its new articles
+            clock: Function returning the current time in seconds
+            rng: Optional random generator used for the jitter
+        """
+        self._searcher: SearchNews = searcher
+        self._queries: List[WatchQuery] = queries
+        self._sink: Callable[[WatchQuery, List[Article]], None] = sink
+        self._clock: Callable[[], float] = clock
+        self._rng: random.Random = rng or random.Random()
+        self._stop: threading.Event = threading.Event()
+        now = clock()
+        # (due time, query position); first polls are spread over the jitter
+        self._schedule: List[Tuple[float, int]] = [
+            (now + self._rng.uniform(0, query.jitter), index)
+            for index, query in enumerate(queries)
+        ]
+        heapq.heapify(self._schedule)
+
+    def stop(self) -> None:
+        """Ask run() to return; safe to call from a signal handler."""
+        self._stop.set()
+
+    def run(self) -> None:
+        """Poll the queries on schedule until stop() is called."""
+        while not self._stop.is_set() and self._schedule:
+            due, index = self._schedule[0]
+            delay = due - self._clock()
+            if delay > 0:
+                self._stop.wait(delay)
+                continue
+            heapq.heappop(self._schedule)
+            query = self._queries[index]
+            self.poll(query)
+            next_due = self._clock() + query.interval + self._rng.uniform(0, query.jitter)
+            heapq.heappush(self._schedule, (next_due, index))
+
+    def poll(self, query: WatchQuery) -> List[Article]:
+        """
+        Fetch one query and pass its new articles to the sink.
+
+        Args:
+            query: The query to fetch
+
+        Returns:
+            The new articles
+        """
+        try:
+            articles = query.new_articles(self._fetch_pages(query))
+            if articles:
+                self._sink(query, articles)
+                query.mark_seen(articles)
+        except Exception as error:
+            print(f"Error polling {query.name}: {error}")
+            return []
+        return articles
+
+    def _fetch_pages(self, query: WatchQuery) -> List[Article]:
+        """
+        Fetch the pages of a query until they reach its last seen articles.
+
+        A failed request for a page after the first raises, so poll() neither
+        delivers the newer pages nor moves last_seen past the failed one.
+
+        Args:
+            query: The query to fetch
+
+        Returns:
+            The articles of every fetched page
+        """
+        articles: List[Article] = []
+        for page in range(1, query.max_pages + 1):
+            response_data = self._searcher.fetch(query.endpoint, query.params(page))
+            if 'articles' not in response_data:
+                if page == 1:
+                    return []
+                # Delivering the newer pages would move last_seen past the
+                # articles of the failed page; retry the whole poll instead
+                raise RuntimeError(f"page {page} request failed")
+            page_articles = [self._searcher.create_article(entry) for entry in response_data['articles']]
+            articles.extend(page_articles)
+            if query.caught_up(page_articles, page, response_data.get('totalResults')):
+                return articles
+        print(f"Warning: {query.name} has more than {query.max_pages} pages of new articles; "
+              f"older ones were skipped")
+        return articles
@@ -0,0 +1,223 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.article import Article
+
+
+def _is_word_char(character: str) -> bool:
+    """Return True if the character can be part of a word."""
+    return character.isalnum() or character == '_'
+
+
+class WatchlistHits:
+    """
+    Class to store the result of scanning articles for watchlist terms.
+
+    Properties:
+        articles: The scanned articles
+        hits: For each article, the terms it mentions in order of first mention
+        date_counts: For each term, the number of articles mentioning it per
+            day (YYYY-MM-DD)
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty result."""
+        self.articles: List[Article] = []
+        self.hits: List[List[str]] = []
+        self.date_counts: Dict[str, Dict[str, int]] = {}
+
+    def add(self, article: Article, terms: List[str]) -> None:
+        """
+        Record the terms mentioned by one article.
+
+        Args:
+            article: The scanned article
+            terms: Distinct terms the article mentions
+        """
+        self.articles.append(article)
+        self.hits.append(terms)
+        if article.published_at is None:
+            return
+        day = article.published_at.split('T')[0]
+        for term in terms:
+            days = self.date_counts.setdefault(term, {})
+            days[day] = days.get(day, 0) + 1
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Convert the per-term, per-date counts to a Pandas DataFrame.
+
+        Returns:
+            Pandas DataFrame with 'term', 'date' and 'count' columns
+        """
+        rows = [(term, day, count)
+                for term, days in self.date_counts.items()
+                for day, count in days.items()]
+        df = pd.DataFrame(rows, columns=['term', 'date', 'count'])
+        return df.sort_values(['term', 'date'], ignore_index=True)
+
+    def hits_df(self) -> pd.DataFrame:
+        """
+        Convert the per-article hit lists to a Pandas DataFrame.
+
+        Returns:
+            Pandas DataFrame with 'url', 'title', 'published_at' and 'hits'
+            columns, one row per article mentioning at least one term
+        """
+        rows = [(article.url, article.title, article.published_at, terms)
+                for article, terms in zip(self.articles, self.hits) if terms]
+        return pd.DataFrame(rows, columns=['url', 'title', 'published_at', 'hits'])
+
+
+class WatchlistMatcher:
+    """
+    Class to find many watchlist terms in text in one pass.
+
+    The terms are compiled once into an Aho-Corasick automaton, so scanning
+    a text costs time proportional to its length (plus the number of
+    matches), however many terms are watched.
+    """
+
+    def __init__(self, terms: Iterable[str], case_sensitive: bool = False,
+                 whole_words: bool = True) -> None:
+        """
+        Build the automaton of a watchlist.
+
+        Args:
+            terms: Terms to watch (e.g., company and people names)
+            case_sensitive: Whether matching distinguishes upper and lower case
+            whole_words: Whether matches must start and end on word boundaries
+        """
+        self.case_sensitive: bool = case_sensitive
+        self.whole_words: bool = whole_words
+        self.terms: List[str] = []
+        self._lengths: List[int] = []
+        # State 0 is the root; _goto[state] maps a character to the next state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        known: Dict[str, int] = {}
+        for term in terms:
+            pattern = self._fold(term)
+            if not pattern or pattern in known:
+                continue
+            known[pattern] = len(self.terms)
+            self._insert(pattern, len(self.terms))
+            self.terms.append(term)
+            self._lengths.append(len(pattern))
+        self._link()
+
+    def _fold(self, text: str) -> str:
+        """
+        Case-fold text character by character, keeping its length.
+
+        Match positions index the original text, so a character whose case
+        folding is several characters long (e.g. 'ß' -> 'ss') is kept as it
+        is: 'Straße' does not match 'STRASSE'.
+        """
+        if self.case_sensitive:
+            return text
+        folded = text.casefold()
+        # Every character folds to at least one character, so equal lengths
+        # mean every character folded to exactly one
+        if len(folded) == len(text):
+            return folded
+        return ''.join(c if len(c.casefold()) != 1 else c.casefold() for c in text)
+
+    def _insert(self, pattern: str, term_id: int) -> None:
+        """Add the states spelling pattern to the trie."""
+        state = 0
+        for character in pattern:
+            next_state = self._goto[state].get(character)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][character] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(term_id)
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first and merge their outputs."""
+        queue: Deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and character not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(character, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: Optional[str]) -> List[Tuple[str, int, int]]:
+        """
+        Find every watchlist term in a text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of (term, start, end) matches, end exclusive, ordered by end
+        """
+        if not text:
+            return []
+        folded = self._fold(text)
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        matches: List[Tuple[str, int, int]] = []
+        state = 0
+        for position, character in enumerate(folded):
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            if not output[state]:
+                continue
+            end = position + 1
+            for term_id in output[state]:
+                start = end - self._lengths[term_id]
+                if self.whole_words and (
+                        (start > 0 and _is_word_char(text[start - 1]))
+                        or (end < len(text) and _is_word_char(text[end]))):
+                    continue
+                matches.append((self.terms[term_id], start, end))
+        return matches
+
+    def match_article(self, article: Article,
+                      fields: Sequence[str] = ('title', 'description', 'content')) -> List[str]:
+        """
+        Find the watchlist terms mentioned by an article.
+
+        Args:
+            article: Article to scan
+            fields: Article attributes to scan
+
+        Returns:
+            Distinct terms mentioned, in order of first mention
+        """
+        # Fields are joined with a line break so no match spans two fields
+        text = '\n'.join((getattr(article, field) or '') for field in fields)
+        return list(dict.fromkeys(term for term, _, _ in self.find(text)))
+
+    def scan(self, articles: Iterable[Article],
+             fields: Sequence[str] = ('title', 'description', 'content')) -> WatchlistHits:
+        """
+        Scan articles for watchlist terms.
+
+        Args:
+            articles: Articles to scan
+            fields: Article attributes to scan
+
+        Returns:
+            WatchlistHits with per-article hit lists and per-term, per-date counts
+        """
+        result = WatchlistHits()
+        for article in articles:
+            result.add(article, self.match_article(article, fields))
+        return result
@@ -1,9 +1,25 @@
 import unittest
+import requests
+import numpy as np
 import pandas as pd
 from src.article import Article
 from src.search_news import SearchNews
 from src.news_processor import NewsProcessor
+from src.single_flight import SingleFlight, AsyncSingleFlight
+from src.key_pool import KeyPool
+from src.article_archive import ArticleArchive
+from src.pipeline import Pipeline, news_pipeline
+from src.aggregate_cube import AggregateCube
+from src.watchlist_matcher import WatchlistMatcher
+from src.profiler import StageProfiler
+from src.watcher import DeltaPoller, WatchQuery
+from src.article_ranker import ArticleRanker, tokenize
+from src.content_fetcher import ContentFetcher, HostRateLimiter, extract_main_text, is_truncated
 import os
+import time
+import asyncio
+import threading
+import tempfile
 from unittest.mock import patch, Mock
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend for testing
@@ -449,5 +465,998 @@ class TestNewsProcessorPlotWordPopularity(unittest.TestCase):
         mock_show.assert_called_once()
 
 
+
+class TestSingleFlight(unittest.TestCase):
+    """Tests for SingleFlight and AsyncSingleFlight request coalescing"""
+
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'articles': []}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', work)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('key', work)))
+                     for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        while flight.coalesced_count < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.coalesced_count, 3)
+
+    def test_error_is_shared(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('key', Mock(side_effect=ValueError("boom")))
+        # A finished call is not reused
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+        self.assertEqual(flight.coalesced_count, 0)
+
+    def test_async_concurrent_calls_share_result(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 42
+
+        async def run():
+            return await asyncio.gather(*(flight.do('key', work) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), [42] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.coalesced_count, 4)
+
+    def test_async_error_is_shared(self):
+        flight = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            return await asyncio.gather(*(flight.do('key', work) for _ in range(3)),
+                                        return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+
+    def test_async_leader_cancel_does_not_cancel_followers(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return 42
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do('key', work))
+            await asyncio.sleep(0)
+            followers = [asyncio.ensure_future(flight.do('key', work)) for _ in range(2)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            return leader.cancelled(), results
+
+        leader_cancelled, results = asyncio.run(run())
+        self.assertTrue(leader_cancelled)
+        self.assertEqual(results, [42, 42])
+        self.assertEqual(len(calls), 1)
+
+
+class TestSearchNewsCoalescing(unittest.TestCase):
+    """Tests for request coalescing in SearchNews"""
+
+    def setUp(self):
+        self.test_key_file = 'test_api_key.txt'
+        with open(self.test_key_file, 'w') as f:
+            f.write('test_api_key')
+        self.searcher = SearchNews(self.test_key_file)
+
+    def tearDown(self):
+        if os.path.exists(self.test_key_file):
+            os.remove(self.test_key_file)
+
+    @patch('requests.get')
+    def test_api_key_sent_with_request(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={'articles': []}))
+
+        self.searcher.get_everything(None, None, None, "bitcoin")
+
+        self.assertEqual(mock_get.call_args[1]['headers']['X-Api-Key'], 'test_api_key')
+        self.assertNotIn('apiKey', mock_get.call_args[1]['params'])
+
+    def test_api_key_not_in_failed_request_error(self):
+        sent_headers = []
+
+        def unreachable(adapter, request, **kwargs):
+            sent_headers.append(request.headers.get('X-Api-Key'))
+            raise requests.ConnectionError(f"Max retries exceeded with url: {request.url}")
+
+        with patch('requests.adapters.HTTPAdapter.send', autospec=True, side_effect=unreachable):
+            with self.assertRaises(requests.ConnectionError) as context:
+                self.searcher.get_everything(None, None, None, "bitcoin")
+
+        self.assertEqual(sent_headers, ['test_api_key'])
+        self.assertIn('q=bitcoin', str(context.exception))
+        self.assertNotIn('test_api_key', str(context.exception))
+
+    @patch('requests.get')
+    def test_identical_concurrent_requests_coalesced(self, mock_get):
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return Mock(status_code=200, json=Mock(return_value={'articles': []}))
+
+        mock_get.side_effect = slow_get
+        threads = [threading.Thread(target=self.searcher._make_request,
+                                    args=('everything', {'q': 'bitcoin'}))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while self.searcher.coalesced_requests < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(self.searcher.coalesced_requests, 3)
+
+    @patch('requests.get')
+    def test_async_request(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={'articles': []}))
+
+        result = asyncio.run(self.searcher.fetch_async('everything', {'q': 'x'}))
+
+        self.assertEqual(result, {'articles': []})
+
+    @patch('requests.get')
+    def test_async_searches_coalesced(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={'articles': [
+            {'title': 'Bitcoin', 'source': {'name': 'BBC'}}]}))
+
+        async def run():
+            return await asyncio.gather(
+                self.searcher.get_everything_async(None, None, None, "bitcoin"),
+                self.searcher.get_everything_async(None, None, None, "bitcoin"),
+                self.searcher.get_top_headlines_async(None, None, 'en'))
+
+        first, second, headlines = asyncio.run(run())
+
+        self.assertEqual([a.title for a in first], ['Bitcoin'])
+        self.assertEqual([a.source for a in second], ['BBC'])
+        self.assertEqual(len(headlines), 1)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(self.searcher.coalesced_requests, 1)
+
+
+
+class TestKeyPool(unittest.TestCase):
+    """Tests for KeyPool key rotation and benching"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.pool = KeyPool(['secret-a', 'secret-b'], quota_per_key=3,
+                            cooldown=10, clock=lambda: self.now)
+
+    def test_from_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'a.txt'), 'w') as f:
+                f.write('key-one\n# comment\n\nkey-two\n')
+            with open(os.path.join(directory, 'b.txt'), 'w') as f:
+                f.write('key-three')
+            pool = KeyPool.from_path(directory)
+
+        self.assertEqual(len(pool), 3)
+
+    def test_spreads_by_remaining_quota(self):
+        labels = [self.pool.acquire().label for _ in range(4)]
+
+        self.assertEqual(sorted(labels), ['key-0', 'key-0', 'key-1', 'key-1'])
+
+    def test_exhausted_quota(self):
+        for _ in range(6):
+            self.assertIsNotNone(self.pool.acquire())
+        self.assertIsNone(self.pool.acquire())
+
+    def test_bench_on_429_until_cooldown(self):
+        key = self.pool.acquire()
+        self.pool.report(key, 429)
+
+        self.assertNotEqual(self.pool.acquire().label, key.label)
+        self.assertTrue(self.pool.usage_stats()[key.label]['benched'])
+        self.now = 11
+        self.assertFalse(self.pool.usage_stats()[key.label]['benched'])
+
+    def test_remaining_header(self):
+        key = self.pool.acquire()
+        self.pool.report(key, 200, {'X-RateLimit-Remaining': '0'})
+
+        self.assertEqual(self.pool.usage_stats()[key.label]['remaining'], 0)
+
+    def test_secrets_never_exposed(self):
+        key = self.pool.acquire()
+        text = str(key) + repr(key) + str(self.pool.usage_stats())
+
+        self.assertNotIn('secret-a', text)
+        self.assertNotIn('secret-b', text)
+
+
+class TestSearchNewsKeyPool(unittest.TestCase):
+    """Tests for SearchNews API key rotation"""
+
+    def setUp(self):
+        self.test_key_file = 'test_api_key.txt'
+        with open(self.test_key_file, 'w') as f:
+            f.write('first_key\nsecond_key\n')
+        self.searcher = SearchNews(self.test_key_file)
+
+    def tearDown(self):
+        if os.path.exists(self.test_key_file):
+            os.remove(self.test_key_file)
+
+    @patch('requests.get')
+    def test_fails_over_on_429(self, mock_get):
+        mock_get.side_effect = [
+            Mock(status_code=429, headers={}),
+            Mock(status_code=200, headers={},
+                 json=Mock(return_value={'articles': [{'title': 'Title 1'}]})),
+        ]
+
+        articles = self.searcher.get_everything()
+
+        self.assertEqual(len(articles), 1)
+        used_keys = [call[1]['headers']['X-Api-Key'] for call in mock_get.call_args_list]
+        self.assertEqual(sorted(used_keys), ['first_key', 'second_key'])
+        stats = self.searcher.key_usage_stats()
+        self.assertEqual(sum(stat['errors'] for stat in stats.values()), 1)
+        self.assertNotIn('first_key', str(stats))
+
+
+
+class TestArticleArchive(unittest.TestCase):
+    """Tests for the memory-mapped ArticleArchive"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'articles.bin')
+        self.articles = [
+            Article(url="https://example.com/1", source="BBC", author="Author 1",
+                    title="Título 1", description="Description 1",
+                    published_at="2024-10-24T12:00:00Z", content="Content 1"),
+            Article(url="https://example.com/2", source="CNN", author=None,
+                    title="Article 2", description=None,
+                    published_at="2024-10-23T12:00:00Z", content=""),
+            Article(url="https://example.com/3", source="BBC", author="Author 1",
+                    title="Article 3"),
+        ]
+        ArticleArchive.write(self.path, self.articles)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lazy_views(self):
+        with ArticleArchive(self.path) as archive:
+            self.assertEqual(len(archive), 3)
+            for original, view in zip(self.articles, archive):
+                self.assertIsInstance(view, Article)
+                for field in ['url', 'source', 'author', 'title', 'description',
+                              'published_at', 'content']:
+                    self.assertEqual(getattr(view, field), getattr(original, field))
+            self.assertEqual(archive[-1].title, "Article 3")
+            with self.assertRaises(IndexError):
+                archive[3]
+
+    def test_to_df_from_buffers(self):
+        with ArticleArchive(self.path) as archive:
+            df = NewsProcessor().to_df(archive)
+            expected = NewsProcessor().to_df(self.articles)
+
+        pd.testing.assert_frame_equal(df, expected)
+        self.assertListEqual(list(df['source']), ['BBC', 'CNN', 'BBC'])
+        self.assertListEqual(df['author'].fillna('Unknown').tolist(),
+                             ['Author 1', 'Unknown', 'Author 1'])
+
+    def test_to_df_with_filter(self):
+        with ArticleArchive(self.path) as archive:
+            df = NewsProcessor().to_df(archive, filter_func=lambda a: a.source == "BBC")
+
+        self.assertEqual(len(df), 2)
+
+    def test_append(self):
+        appended = [
+            Article(source="Reuters", author="Author 1", title="Article 4"),
+            Article(source="CNN", author="Author 5", title="Article 5"),
+        ]
+        ArticleArchive.append(self.path, [])
+        ArticleArchive.append(self.path, appended)
+
+        with ArticleArchive(self.path) as archive:
+            self.assertEqual(len(archive), 5)
+            self.assertEqual([a.source for a in archive], ['BBC', 'CNN', 'BBC', 'Reuters', 'CNN'])
+            self.assertEqual(archive[4].author, "Author 5")
+            self.assertEqual(archive[0].title, "Título 1")
+            df = archive.to_df()
+        pd.testing.assert_frame_equal(df, NewsProcessor().to_df(self.articles + appended))
+        self.assertListEqual(df['author'].tolist()[3:], ['Author 1', 'Author 5'])
+
+    def test_interrupted_append_keeps_archive_readable(self):
+        with patch.object(ArticleArchive, '_set_trailer_offset', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                ArticleArchive.append(self.path, [Article(source="Reuters", title="Lost")])
+        with open(self.path, 'ab') as f:
+            f.write(b'\xff' * 13)  # torn write past the new trailer
+
+        with ArticleArchive(self.path) as archive:
+            self.assertEqual([a.title for a in archive], ["Título 1", "Article 2", "Article 3"])
+
+        ArticleArchive.append(self.path, [Article(source="Reuters", title="Article 4")])
+        with ArticleArchive(self.path) as archive:
+            self.assertEqual([a.source for a in archive], ['BBC', 'CNN', 'BBC', 'Reuters'])
+            self.assertEqual(archive[3].title, "Article 4")
+
+    def test_not_an_archive(self):
+        other = os.path.join(self.directory.name, 'other.bin')
+        with open(other, 'wb') as f:
+            f.write(b'{"articles": []}' * 4)
+        with self.assertRaises(ValueError):
+            ArticleArchive(other)
+
+
+
+class TestPipeline(unittest.TestCase):
+    """Tests for the staged Pipeline"""
+
+    def test_items_flow_through_stages(self):
+        results = []
+        results_lock = threading.Lock()
+
+        def collect(item):
+            with results_lock:
+                results.append(item)
+
+        pipeline = (Pipeline()
+                    .add_stage("split", lambda n: [n, n + 100], workers=3)
+                    .add_stage("double", lambda n: [n * 2], workers=2)
+                    .add_stage("sink", collect))
+        pipeline.run(range(10))
+
+        self.assertEqual(sorted(results), sorted([n * 2 for n in range(10)] +
+                                                 [(n + 100) * 2 for n in range(10)]))
+        stats = pipeline.stats()
+        self.assertEqual(stats["split"]["processed"], 10)
+        self.assertEqual(stats["split"]["emitted"], 20)
+        self.assertEqual(stats["sink"]["processed"], 20)
+
+    def test_errors_are_counted(self):
+        def fail_on_odd(n):
+            if n % 2:
+                raise ValueError("odd")
+            return [n]
+
+        pipeline = Pipeline().add_stage("check", fail_on_odd).add_stage("sink", lambda n: None)
+        with patch('builtins.print'):
+            pipeline.run(range(6))
+
+        self.assertEqual(pipeline.stats()["check"]["errors"], 3)
+        self.assertEqual(pipeline.stats()["sink"]["processed"], 3)
+
+    def test_slow_sink_applies_backpressure(self):
+        release = threading.Event()
+        pipeline = (Pipeline()
+                    .add_stage("fetch", lambda n: [n], queue_size=2)
+                    .add_stage("sink", lambda n: release.wait(5) and None, queue_size=2))
+        pipeline.start()
+        submitted = []
+
+        def feed():
+            for n in range(20):
+                pipeline.submit(n)
+                submitted.append(n)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        time.sleep(0.2)
+        # 2 queued per stage, 1 in each stage and 1 blocked in fetch's put
+        self.assertLess(len(submitted), 10)
+        release.set()
+        feeder.join(5)
+        pipeline.close()
+        self.assertEqual(pipeline.stats()["sink"]["processed"], 20)
+
+    def test_stop_drops_queued_items(self):
+        release = threading.Event()
+        pipeline = Pipeline().add_stage("slow", lambda n: release.wait(5) and None)
+        pipeline.start()
+        for n in range(5):
+            pipeline.submit(n)
+        stopper = threading.Thread(target=pipeline.stop)
+        stopper.start()
+        time.sleep(0.05)
+        release.set()
+        stopper.join(5)
+
+        self.assertLess(pipeline.stats()["slow"]["processed"], 5)
+
+
+class TestNewsPipeline(unittest.TestCase):
+    """Tests for the news fetch/parse/dedup/sink pipeline"""
+
+    def setUp(self):
+        self.test_key_file = 'test_api_key.txt'
+        with open(self.test_key_file, 'w') as f:
+            f.write('test_api_key')
+        self.searcher = SearchNews(self.test_key_file)
+
+    def tearDown(self):
+        if os.path.exists(self.test_key_file):
+            os.remove(self.test_key_file)
+
+    @patch('requests.get')
+    def test_dedup_and_filter(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, headers={}, json=Mock(return_value={
+            'articles': [
+                {'url': 'https://example.com/1', 'title': 'Title 1', 'source': {'name': 'BBC'}},
+                {'url': 'https://example.com/2', 'title': None, 'source': None},
+            ]
+        }))
+        collected = []
+
+        pipeline = news_pipeline(self.searcher, collected.append,
+                                 filter_func=lambda a: a.title is not None)
+        pipeline.run([('everything', {'q': 'a'}), ('everything', {'q': 'b'})])
+
+        self.assertEqual([a.url for a in collected], ['https://example.com/1'])
+        self.assertEqual(collected[0].source, 'BBC')
+        self.assertEqual(pipeline.stats()["parse"]["processed"], 4)
+
+
+
+class TestContentFetcher(unittest.TestCase):
+    """Tests for the full-content ContentFetcher"""
+
+    PAGE = ("<html><head><script>var x = 1;</script></head><body>"
+            "<nav><p>Menu</p></nav><article><h1>Headline</h1>"
+            "<p>First &amp; <b>bold</b> paragraph.</p><p>Second   paragraph.</p>"
+            "</article><footer><p>Copyright</p></footer></body></html>")
+
+    def setUp(self):
+        self.fetcher = ContentFetcher(min_interval_per_host=0)
+        self.article = Article(url="https://example.com/a",
+                               content="Short version of the text… [+2817 chars]")
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def test_is_truncated(self):
+        self.assertTrue(is_truncated("Some text [+123 chars]"))
+        self.assertFalse(is_truncated("Some text"))
+        self.assertFalse(is_truncated(None))
+
+    def test_extract_main_text(self):
+        self.assertEqual(extract_main_text(self.PAGE),
+                         "First & bold paragraph.\n\nSecond paragraph.")
+
+    def test_extract_main_text_with_unclosed_paragraphs(self):
+        self.assertEqual(extract_main_text("<article><p>First<p>Second</article>"), "First\n\nSecond")
+        self.assertEqual(extract_main_text("<div><p>text<div>more</div>"), "text")
+        self.assertEqual(extract_main_text("<ul><li>One<li>Two</ul><p>Last"), "One\n\nTwo\n\nLast")
+
+    def test_enrich_replaces_truncated_content(self):
+        response = Mock(status_code=200, text=self.PAGE, headers={'ETag': '"v1"'})
+        with patch.object(self.fetcher._session, 'get', return_value=response) as mock_get:
+            self.fetcher.enrich([self.article, Article(url="https://example.com/b", content="Full")])
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertTrue(self.article.content.startswith("First & bold paragraph."))
+
+    def test_cache_revalidation(self):
+        responses = [Mock(status_code=200, text=self.PAGE, headers={'ETag': '"v1"'}),
+                     Mock(status_code=304, text='', headers={})]
+        with patch.object(self.fetcher._session, 'get', side_effect=responses) as mock_get:
+            first = self.fetcher.fetch_text("https://example.com/a")
+            second = self.fetcher.fetch_text("https://example.com/a")
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_get.call_args[1]['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(self.fetcher.revalidated, 1)
+
+    def test_failed_fetch_keeps_content(self):
+        with patch.object(self.fetcher._session, 'get', return_value=Mock(status_code=404)):
+            self.fetcher.enrich_article(self.article)
+
+        self.assertTrue(is_truncated(self.article.content))
+        self.assertEqual(self.fetcher.errors, 1)
+
+    def test_read_only_articles_rejected(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'articles.bin')
+            ArticleArchive.write(path, [self.article])
+            with ArticleArchive(path) as archive:
+                with self.assertRaises(TypeError):
+                    self.fetcher.enrich(list(archive))
+
+    def test_failed_update_resolves_future(self):
+        class Locked(Article):
+            def __setattr__(self, name, value):
+                if name == 'content' and hasattr(self, 'content'):
+                    raise AttributeError("content is locked")
+                super().__setattr__(name, value)
+
+        article = Locked(url="https://example.com/a", content="Short [+10 chars]")
+        response = Mock(status_code=200, text=self.PAGE, headers={})
+        with patch.object(self.fetcher._session, 'get', return_value=response):
+            with self.assertRaises(AttributeError):
+                self.fetcher.submit(article).result(timeout=5)
+
+    def test_rate_limiter_hands_out_ready_requests(self):
+        now = [0.0]
+        limiter = HostRateLimiter(min_interval=1.0, max_concurrent=2, clock=lambda: now[0])
+        for number in range(3):
+            limiter.push("a.com", f"a{number}")
+        limiter.push("b.com", "b0")
+
+        self.assertEqual(limiter.pop_ready(), [("a.com", "a0"), ("b.com", "b0")])
+        self.assertEqual(limiter.pop_ready(), [])
+        self.assertEqual(limiter.next_ready_in(), 1.0)
+        now[0] = 1.0
+        self.assertEqual(limiter.pop_ready(), [("a.com", "a1")])
+        now[0] = 5.0
+        self.assertEqual(limiter.pop_ready(), [])
+        self.assertIsNone(limiter.next_ready_in())
+        limiter.release("a.com")
+        self.assertEqual(limiter.pop_ready(), [("a.com", "a2")])
+
+    def test_busy_host_does_not_delay_other_hosts(self):
+        fetcher = ContentFetcher(workers=2, min_interval_per_host=60)
+        response = Mock(status_code=200, text=self.PAGE, headers={})
+        with patch.object(fetcher._session, 'get', return_value=response) as mock_get:
+            first = fetcher.submit(Article(url="https://slow.com/1", content="a [+1 chars]"))
+            second = fetcher.submit(Article(url="https://slow.com/2", content="b [+1 chars]"))
+            other = fetcher.submit(Article(url="https://other.com/1", content="c [+1 chars]"))
+            other.result(timeout=5)
+            first.result(timeout=5)
+            self.assertFalse(second.done())
+            fetcher.close()
+
+        self.assertTrue(second.cancelled())
+        self.assertEqual(mock_get.call_count, 2)
+
+
+
+class TestArticleRanker(unittest.TestCase):
+    """Tests for TF-IDF/BM25 ArticleRanker"""
+
+    def setUp(self):
+        self.articles = [
+            Article(title="Bitcoin price surges", description="Crypto markets rally"),
+            Article(title="Stock market update", description="Dow falls, bitcoin flat"),
+            Article(title="Weather today", content="Rain all day [+200 chars]"),
+            Article(title="Bitcoin crash fears", description="Crypto winter is back"),
+        ]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Rain, all day [+200 chars]"), ['rain', 'all', 'day'])
+        self.assertEqual(tokenize(None), [])
+
+    def test_rank_tfidf(self):
+        df = ArticleRanker(self.articles).rank("bitcoin crypto")
+
+        self.assertEqual(len(df), 3)
+        self.assertIn('score', df.columns)
+        self.assertNotIn("Weather today", df['title'].tolist())
+        self.assertEqual(df.iloc[-1]['title'], "Stock market update")
+        self.assertTrue(df['score'].is_monotonic_decreasing)
+
+    def test_rank_bm25(self):
+        df = ArticleRanker(self.articles, method='bm25').rank("crypto", top_n=1)
+
+        self.assertEqual(len(df), 1)
+        self.assertIn(df.iloc[0]['title'], ["Bitcoin price surges", "Bitcoin crash fears"])
+
+    def test_unknown_terms(self):
+        df = ArticleRanker(self.articles).rank("ethereum")
+
+        self.assertEqual(len(df), 0)
+        self.assertListEqual(list(df.columns), list(ArticleRanker(self.articles).rank("bitcoin").columns))
+        self.assertEqual(df['score'].dtype, np.float64)
+
+    def test_incremental_add_matches_single_build(self):
+        ranker = ArticleRanker(self.articles[:2])
+        ranker.rank("bitcoin")
+        ranker.add(self.articles[2:])
+
+        incremental = ranker.rank("bitcoin crypto")
+        single = ArticleRanker(self.articles).rank("bitcoin crypto")
+        self.assertListEqual(incremental['title'].tolist(), single['title'].tolist())
+        self.assertTrue(np.allclose(incremental['score'], single['score']))
+
+    def test_similar(self):
+        df = ArticleRanker(self.articles).similar(self.articles[0])
+
+        self.assertEqual(df.iloc[0]['title'], "Bitcoin crash fears")
+        self.assertNotIn("Bitcoin price surges", df['title'].tolist())
+        self.assertTrue((df['score'] <= 1.0 + 1e-9).all())
+
+    def test_similar_index_types(self):
+        ranker = ArticleRanker(self.articles)
+        expected = ranker.similar(3)
+
+        pd.testing.assert_frame_equal(ranker.similar(-1), expected)
+        pd.testing.assert_frame_equal(ranker.similar(np.int64(3)), expected)
+        with self.assertRaises(IndexError):
+            ranker.similar(4)
+        with self.assertRaises(IndexError):
+            ranker.similar(-5)
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            ArticleRanker(method='lsi')
+
+
+
+class TestWatcher(unittest.TestCase):
+    """Tests for WatchQuery and the DeltaPoller"""
+
+    def setUp(self):
+        self.test_key_file = 'test_api_key.txt'
+        with open(self.test_key_file, 'w') as f:
+            f.write('test_api_key')
+        self.searcher = SearchNews(self.test_key_file)
+
+    def tearDown(self):
+        if os.path.exists(self.test_key_file):
+            os.remove(self.test_key_file)
+
+    def response(self, *entries):
+        return Mock(status_code=200, headers={}, json=Mock(return_value={'articles': [
+            {'url': url, 'title': url, 'publishedAt': published_at}
+            for url, published_at in entries
+        ]}))
+
+    def test_params_use_last_seen(self):
+        query = WatchQuery("q", terms=["bitcoin"], domains=["bbc.co.uk"],
+                           since="2024-10-24T12:00:00Z")
+
+        self.assertEqual(query.params(2), {'q': 'bitcoin', 'domains': 'bbc.co.uk',
+                                           'sortBy': 'publishedAt',
+                                           'from': '2024-10-24T12:00:00Z',
+                                           'pageSize': '100', 'page': '2'})
+
+    @patch('requests.get')
+    def test_poll_delivers_only_new_articles(self, mock_get):
+        delivered = []
+        query = WatchQuery("q", terms=["bitcoin"])
+        poller = DeltaPoller(self.searcher, [query], lambda q, articles: delivered.append(articles))
+
+        mock_get.return_value = self.response(("b", "2024-10-24T13:00:00Z"),
+                                              ("a", "2024-10-24T12:00:00Z"))
+        poller.poll(query)
+        mock_get.return_value = self.response(("c", "2024-10-24T13:00:00Z"),
+                                              ("b", "2024-10-24T13:00:00Z"),
+                                              ("a", "2024-10-24T12:00:00Z"))
+        poller.poll(query)
+        poller.poll(query)
+
+        self.assertEqual([[a.url for a in batch] for batch in delivered], [['a', 'b'], ['c']])
+        self.assertEqual(mock_get.call_args[1]['params']['from'], "2024-10-24T13:00:00Z")
+
+    @patch('requests.get')
+    def test_poll_pages_back_to_last_seen(self, mock_get):
+        delivered = []
+        query = WatchQuery("q", terms=["bitcoin"], since="2024-10-24T10:00:00Z", page_size=2)
+        poller = DeltaPoller(self.searcher, [query], lambda q, articles: delivered.append(articles))
+        pages = {
+            '1': self.response(("d", "2024-10-24T14:00:00Z"), ("c", "2024-10-24T13:00:00Z")),
+            '2': self.response(("b", "2024-10-24T12:00:00Z"), ("a", "2024-10-24T11:00:00Z")),
+            '3': self.response(),
+        }
+        mock_get.side_effect = lambda url, params, headers: pages[params['page']]
+
+        poller.poll(query)
+
+        self.assertEqual([a.url for a in delivered[0]], ['a', 'b', 'c', 'd'])
+        self.assertEqual([c[1]['params']['page'] for c in mock_get.call_args_list], ['1', '2', '3'])
+        self.assertEqual(query.last_seen, "2024-10-24T14:00:00Z")
+
+    @patch('requests.get')
+    def test_failed_page_keeps_last_seen(self, mock_get):
+        sink = Mock()
+        query = WatchQuery("q", terms=["bitcoin"], since="2024-10-24T10:00:00Z", page_size=2)
+        poller = DeltaPoller(self.searcher, [query], sink)
+        mock_get.side_effect = [
+            self.response(("d", "2024-10-24T14:00:00Z"), ("c", "2024-10-24T13:00:00Z")),
+            Mock(status_code=500, headers={}),
+        ]
+
+        with patch('builtins.print'):
+            articles = poller.poll(query)
+
+        self.assertEqual(articles, [])
+        sink.assert_not_called()
+        self.assertEqual(query.last_seen, "2024-10-24T10:00:00Z")
+
+    @patch('requests.get')
+    def test_poll_warns_when_pages_run_out(self, mock_get):
+        query = WatchQuery("q", terms=["bitcoin"], since="2024-10-24T10:00:00Z",
+                           page_size=1, max_pages=2)
+        poller = DeltaPoller(self.searcher, [query], Mock())
+        mock_get.side_effect = [self.response(("b", "2024-10-24T12:00:00Z")),
+                                self.response(("a", "2024-10-24T11:00:00Z"))]
+
+        with patch('builtins.print') as mock_print:
+            articles = poller.poll(query)
+
+        self.assertEqual([a.url for a in articles], ['a', 'b'])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertIn("more than 2 pages", mock_print.call_args[0][0])
+
+    @patch('requests.get')
+    def test_failed_sink_keeps_articles(self, mock_get):
+        query = WatchQuery("q", terms=["bitcoin"])
+        poller = DeltaPoller(self.searcher, [query], Mock(side_effect=IOError("disk full")))
+        mock_get.return_value = self.response(("a", "2024-10-24T12:00:00Z"))
+
+        with patch('builtins.print'):
+            poller.poll(query)
+
+        self.assertIsNone(query.last_seen)
+
+    def test_schedule_and_stop(self):
+        now = [0.0]
+        polled = []
+        queries = [WatchQuery("fast", interval=1, jitter=0), WatchQuery("slow", interval=5, jitter=0)]
+        poller = DeltaPoller(self.searcher, queries, Mock(), clock=lambda: now[0])
+
+        def poll(query):
+            polled.append((now[0], query.name))
+            if len(polled) == 6:
+                poller.stop()
+            return []
+
+        def wait(delay):
+            now[0] += delay
+            return False
+
+        poller.poll = poll
+        poller._stop.wait = wait
+        poller.run()
+
+        self.assertEqual(polled, [(0, 'fast'), (0, 'slow'), (1, 'fast'), (2, 'fast'),
+                                  (3, 'fast'), (4, 'fast')])
+
+
+
+class TestStageProfiler(unittest.TestCase):
+    """Tests for the StageProfiler used by main.py --profile"""
+
+    def test_disabled_profiler_does_nothing(self):
+        profiler = StageProfiler()
+        profiler.start()
+        with profiler.stage("work"):
+            pass
+        profiler.stop()
+
+        self.assertFalse(profiler.enabled)
+        self.assertIs(profiler.stage("a"), profiler.stage("b"))
+        self.assertEqual(profiler.reports(), [])
+
+    def test_enabled_profiler_writes_reports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = StageProfiler(directory, sample_interval=0.001)
+            profiler.start()
+            with profiler.stage("build"):
+                articles = [Article(title=f"Title {n}") for n in range(2000)]
+                time.sleep(0.01)
+            with profiler.stage("to_df"):
+                NewsProcessor().to_df(articles)
+            profiler.stop()
+
+            files = sorted(os.listdir(directory))
+            with open(os.path.join(directory, 'report.txt')) as f:
+                report = f.read()
+            with open(os.path.join(directory, 'stacks.folded')) as f:
+                stacks = f.read().splitlines()
+
+        self.assertEqual(files, ['00_build.pstats', '01_to_df.pstats', 'report.txt', 'stacks.folded'])
+        self.assertIn("=== to_df ===", report)
+        self.assertIn("Top allocation sites:", report)
+        self.assertIn("stacks.folded samples every thread", report)
+        self.assertEqual(list(profiler.summary()), ["build", "to_df"])
+        self.assertGreater(profiler.summary()["build"]["peak_bytes"], 0)
+        self.assertTrue(stacks)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in stacks))
+
+    def test_peak_excludes_memory_in_use_before_stage(self):
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = StageProfiler(directory)
+            profiler.start()
+            retained = bytearray(8 * 2 ** 20)
+            with profiler.stage("small"):
+                small = bytearray(2 ** 16)
+            profiler.stop()
+
+        self.assertEqual(len(retained) + len(small), 8 * 2 ** 20 + 2 ** 16)
+        self.assertGreaterEqual(profiler.summary()["small"]["peak_bytes"], 2 ** 16)
+        self.assertLess(profiler.summary()["small"]["peak_bytes"], 2 ** 20)
+
+    def test_nested_stages_rejected(self):
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = StageProfiler(directory)
+            profiler.start()
+            try:
+                with profiler.stage("outer"):
+                    with self.assertRaises(RuntimeError):
+                        with profiler.stage("inner"):
+                            pass
+            finally:
+                profiler.stop()
+
+
+
+class TestAggregateCube(unittest.TestCase):
+    """Tests for the source/author/day AggregateCube"""
+
+    def setUp(self):
+        self.articles = [
+            Article(source="BBC", author="Ann", title="Bitcoin rises", published_at="2024-10-21T12:00:00Z"),
+            Article(source="BBC", author="Bob", title="Bitcoin falls", published_at="2024-10-21T15:00:00Z"),
+            Article(source="CNN", author="Ann", title="Stock update", published_at="2024-10-22T12:00:00Z"),
+            Article(source="CNN", author=None, title="BITCOIN news", published_at="2024-10-28T12:00:00Z"),
+            Article(source="BBC", author="Ann", title="Weather", published_at=None),
+        ]
+        self.cube = AggregateCube(self.articles, terms=["bitcoin"])
+
+    def test_matches_pandas_groupby(self):
+        df = NewsProcessor().to_df(self.articles)
+        df['day'] = df['published_at'].str.split('T').str[0]
+        expected = df.groupby(['source', 'day']).size()
+
+        result = self.cube.query(by=('source', 'day'))
+        result = result[result['day'].notna()]
+        self.assertEqual({(row.source, row.day): row.count for row in result.itertuples()},
+                         expected.to_dict())
+
+    def test_grand_total_and_term_hits(self):
+        self.assertEqual(self.cube.query()['count'][0], 5)
+        self.assertEqual(self.cube.query(measure='bitcoin')['bitcoin'][0], 3)
+
+    def test_daily_slice(self):
+        self.assertEqual(self.cube.daily(sources=["BBC"]), {'2024-10-21': 2})
+        self.assertEqual(self.cube.daily('bitcoin', start='2024-10-22'), {'2024-10-22': 0, '2024-10-28': 1})
+
+    def test_top_authors_for_week(self):
+        top = self.cube.top('author', n=1, start='2024-10-21', end='2024-10-27')
+
+        self.assertEqual(top.iloc[0]['author'], 'Ann')
+        self.assertEqual(top.iloc[0]['count'], 2)
+
+    def test_incremental_add(self):
+        cube = AggregateCube(terms=["bitcoin"])
+        cube.add(self.articles[:2])
+        cube.add(self.articles[2:])
+
+        self.assertTrue(cube.query(by=('source', 'author', 'day'))
+                        .equals(self.cube.query(by=('source', 'author', 'day'))))
+
+    def test_invalid_query(self):
+        with self.assertRaises(ValueError):
+            self.cube.query(by=('country',))
+        with self.assertRaises(ValueError):
+            self.cube.query(measure='ethereum')
+        with self.assertRaises(ValueError):
+            AggregateCube(terms=["bitcoin", "count"])
+
+    def test_date_range_reads_only_requested_days(self):
+        class Recording(dict):
+            def __init__(self, cells):
+                super().__init__(cells)
+                self.read = []
+
+            def __getitem__(self, day):
+                self.read.append(day)
+                return super().__getitem__(day)
+
+        days = Recording(self.cube._cuboids[('author', 'day')])
+        self.cube._cuboids[('author', 'day')] = days
+        top = self.cube.top('author', start='2024-10-22', end='2024-10-27')
+
+        self.assertEqual(days.read, ['2024-10-22'])
+        self.assertEqual(top['author'].tolist(), ['Ann'])
+
+    @patch('matplotlib.pyplot.show')
+    def test_plot_cube(self, mock_show):
+        NewsProcessor().plot_cube(self.cube, 'bitcoin', sources=["BBC"])
+        mock_show.assert_called_once()
+
+
+
+class TestWatchlistMatcher(unittest.TestCase):
+    """Tests for the Aho-Corasick WatchlistMatcher"""
+
+    def setUp(self):
+        self.matcher = WatchlistMatcher(["Apple", "Apple Inc", "Tim Cook", "pie", "he", "she", "hers"])
+
+    def test_overlapping_terms(self):
+        matcher = WatchlistMatcher(["he", "she", "hers", "his"], whole_words=False)
+
+        self.assertEqual(matcher.find("ushers"),
+                         [("she", 1, 4), ("he", 2, 4), ("hers", 2, 6)])
+
+    def test_word_boundaries_and_case(self):
+        matches = self.matcher.find("APPLE INC said Tim cook likes pineapple pie; she agreed.")
+
+        self.assertEqual([term for term, _, _ in matches],
+                         ["Apple", "Apple Inc", "Tim Cook", "pie", "she"])
+
+    def test_case_folding_keeps_positions(self):
+        matcher = WatchlistMatcher(["ΛΟΓΟΣ", "Straße"])
+        text = "Ein λογο\u03c2 in der STRASSE und der Straße"
+
+        self.assertEqual(matcher.find(text), [("ΛΟΓΟΣ", 4, 9), ("Straße", 33, 39)])
+
+    def test_case_sensitive_substrings(self):
+        matcher = WatchlistMatcher(["Apple"], case_sensitive=True, whole_words=False)
+
+        self.assertEqual(matcher.find("apple Pineapple Apple"), [("Apple", 16, 21)])
+
+    def test_matches_naive_search(self):
+        terms = ["ab", "bc", "abc", "c", "bca"]
+        matcher = WatchlistMatcher(terms, whole_words=False)
+        text = "abcabcaabca"
+        expected = sorted((term, i, i + len(term)) for term in terms
+                          for i in range(len(text)) if text.startswith(term, i))
+
+        self.assertEqual(sorted(matcher.find(text)), expected)
+
+    def test_scan_articles(self):
+        articles = [
+            Article(title="Apple results", description="Tim Cook speaks", published_at="2024-10-24T12:00:00Z"),
+            Article(title="Markets", content="apple and Apple again", published_at="2024-10-24T15:00:00Z"),
+            Article(title="Weather", published_at="2024-10-25T12:00:00Z"),
+        ]
+
+        hits = self.matcher.scan(articles)
+
+        self.assertEqual(hits.hits, [["Apple", "Tim Cook"], ["Apple"], []])
+        self.assertEqual(hits.date_counts, {"Apple": {"2024-10-24": 2}, "Tim Cook": {"2024-10-24": 1}})
+        df = hits.to_df()
+        self.assertListEqual(list(df.columns), ['term', 'date', 'count'])
+        self.assertEqual(len(hits.hits_df()), 2)
+
+    def test_no_match_across_fields(self):
+        article = Article(title="Tim", description="Cook")
+
+        self.assertEqual(self.matcher.match_article(article), [])
+
+    @patch('matplotlib.pyplot.show')
+    def test_plot_watchlist(self, mock_show):
+        hits = self.matcher.scan([Article(title="Apple", published_at="2024-10-24T12:00:00Z")])
+
+        NewsProcessor().plot_watchlist(hits, "Apple")
+        mock_show.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file